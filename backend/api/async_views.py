@@ -0,0 +1,240 @@
+"""
+Async versions of the read-heavy API views, for running under ASGI (uvicorn).
+
+A sync view holds a worker thread for the whole request, including the time
+spent waiting on the database. These views await the database with Django's
+async ORM instead, so one process can keep many more requests in flight.
+
+They return exactly what the views in api/views.py return (same JSON bytes,
+ETags and status codes) and are switched on with ASYNC_VIEWS=true, see
+api/urls.py. DRF's @api_view is sync only, so the things it does for us
+(method check, token authentication, JSON errors) are done here by hand.
+Only token authentication is supported, which is what the frontend uses.
+
+order_events (the live order status stream) has no sync version and is
+always routed here.
+
+Run with:
+    ASYNC_VIEWS=true uvicorn fooddelivery.asgi:application --workers 4
+"""
+import asyncio
+import functools
+import logging
+import time
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+
+from . import fast_serializers, tracking
+from .authentication import aauthenticate
+from .caching import menu_cache, order_cache
+from .models import FoodItem, Order
+from .pubsub import get_broker
+from .renderers import render_json
+from .timing import record_phase
+from .views import _snapshot_response, food_paginator, order_paginator
+
+logger = logging.getLogger(__name__)
+
+
+def _json(data, status=200):
+    """JSON response rendered like a DRF Response"""
+    return HttpResponse(render_json(data), status=status, content_type='application/json')
+
+
+def async_api_view(require_auth=False):
+    """
+    What @api_view(['GET']) and @permission_classes do for the sync views:
+    405 for other methods and, with require_auth, 401 unless a valid token
+    was sent. The authenticated user is put on request.user.
+    Like DRF views, exempt from CSRF checks (only token authentication is
+    accepted), so a POST gets the JSON 405 rather than Django's HTML 403.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                response = _json({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+                response['Allow'] = 'GET, HEAD'
+                return response
+
+            if require_auth:
+                try:
+                    credentials = await aauthenticate(request)
+                except AuthenticationFailed as e:
+                    credentials = None
+                    detail = e.detail
+                else:
+                    detail = 'Authentication credentials were not provided.'
+                if credentials is None:
+                    response = _json({'detail': detail}, status=401)
+                    response['WWW-Authenticate'] = 'Token'
+                    return response
+                request.user, request.auth = credentials
+
+            return await view(request, *args, **kwargs)
+
+        # Django 4.2's @csrf_exempt wraps in a sync function, which would hide
+        # that the view is async - so set the flag it sets directly
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+@async_api_view()
+async def health_check(request):
+    """
+    Health check endpoint for monitoring.
+    GET /api/health/
+    """
+    return _json({
+        'status': 'healthy',
+        'message': 'API is operational'
+    })
+
+
+@async_api_view()
+async def food_list(request):
+    """
+    Get the menu, one page at a time (async version of views.food_list).
+    GET /api/foods/?limit=20&cursor=<next cursor>
+    """
+    context = {'request': request}
+    try:
+        try:
+            # Includes the host: media URLs and the "next" link are absolute
+            page = food_paginator.page_key(request)
+        except ValueError as e:
+            return _json({'error': str(e)}, status=400)
+
+        async def build_page():
+            rows = fast_serializers.food_rows(FoodItem.objects.all())
+            foods, next_cursor = await food_paginator.apaginate(request, rows)
+            return {
+                'results': fast_serializers.food_list_data(foods, context),
+                'next': food_paginator.get_next_link(request, next_cursor),
+            }
+
+        snapshot = await menu_cache.aget_or_build(('food_page', page), build_page)
+        return _snapshot_response(request, snapshot)
+    except Exception as e:
+        logger.exception('Error in food_list')
+        return _json({'error': 'Failed to retrieve food items', 'detail': str(e)}, status=500)
+
+
+@async_api_view(require_auth=True)
+async def cart_view(request):
+    """
+    Get current user's cart items (async version of views.cart_view).
+    GET /api/cart/
+    """
+    try:
+        rows = [row async for row in fast_serializers.cart_rows(request.user)]
+        with record_phase('serialize'):
+            items, total = fast_serializers.cart_items_data(rows, {'request': request})
+        return _json({
+            'items': items,
+            'total': float(total)
+        })
+    except Exception as e:
+        logger.exception('Error in cart_view')
+        return _json({'error': 'Failed to retrieve cart', 'detail': str(e)}, status=500)
+
+
+@async_api_view(require_auth=True)
+async def order_list(request):
+    """
+    Get the current user's past orders, newest first (async version of views.order_list).
+    GET /api/orders/?limit=20&cursor=<next cursor>
+    """
+    try:
+        page = order_paginator.page_key(request)
+    except ValueError as e:
+        return _json({'error': str(e)}, status=400)
+
+    async def build():
+        rows = fast_serializers.order_rows(Order.objects.filter(user=request.user))
+        orders, next_cursor = await order_paginator.apaginate(request, rows)
+        item_rows = []
+        if orders:
+            order_ids = [order['id'] for order in orders]
+            item_rows = [row async for row in fast_serializers.order_item_rows(order_ids)]
+        return {
+            'results': fast_serializers.orders_with_items_data(orders, item_rows, {'request': request}),
+            'next': order_paginator.get_next_link(request, next_cursor),
+        }
+
+    key = ('order_list', page)
+    snapshot = await order_cache.aget_or_build(key, build, scope=request.user.id)
+    return _snapshot_response(request, snapshot, cache_control='private, no-cache')
+
+
+def _sse(event):
+    """One Server-Sent Event carrying a tracking.status_event() dict"""
+    return b'event: status\ndata: ' + render_json(event) + b'\n\n'
+
+
+async def _status_stream(order_id):
+    """The order's status now, then every change until it is delivered or deleted"""
+    yield b'retry: 3000\n\n'  # Browser reconnects after 3 s if the stream drops
+    async with get_broker().subscribe(tracking.channel_name(order_id)) as queue:
+        # Read the status after subscribing, so a change in between is not missed
+        status = await Order.objects.filter(id=order_id).values_list('status', flat=True).afirst()
+        if status not in tracking.STATUSES:
+            # Deleted since order_events() looked it up
+            yield _sse(tracking.untracked_event(order_id))
+            return
+        yield _sse(tracking.status_event(order_id, status))
+
+        # Django 4.2 can't tell us when the client went away, so every stream
+        # ends after ORDER_STREAM_MAX_SECONDS; a client still there reconnects
+        deadline = time.monotonic() + settings.ORDER_STREAM_MAX_SECONDS
+        while not tracking.is_final(status):
+            timeout = min(settings.ORDER_STREAM_HEARTBEAT, deadline - time.monotonic())
+            if timeout <= 0:
+                break
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                yield b': keep-alive\n\n'  # Stops proxies from closing an idle stream
+                continue
+            if event['status'] not in tracking.STATUSES:
+                # The order was deleted (tracking.publish_removed): nothing more will come
+                yield _sse(tracking.untracked_event(order_id))
+                return
+            # Orders only move forward; ignore anything we have already sent
+            if tracking.STATUSES.index(event['status']) > tracking.STATUSES.index(status):
+                status = event['status']
+                yield _sse(event)
+
+
+@async_api_view(require_auth=True)
+async def order_events(request, order_id):
+    """
+    Live status of one of the current user's orders, as Server-Sent Events.
+    GET /api/orders/{order_id}/events/
+    Sends the current status at once and then each change
+    ("event: status", data = {"order", "status", "label", "final"}).
+    The stream ends once the order is delivered, or with a final event whose
+    status is null if the order is deleted.
+    """
+    status = await Order.objects.filter(id=order_id, user=request.user).values_list(
+        'status', flat=True
+    ).afirst()
+    if status not in tracking.STATUSES:
+        return _json({'error': 'Order not found'}, status=404)
+
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI a long-lived stream would hold a worker thread, so send
+        # the current status only and let the browser come back in 10 s
+        response = HttpResponse(
+            b'retry: 10000\n\n' + _sse(tracking.status_event(order_id, status)),
+            content_type='text/event-stream'
+        )
+    else:
+        response = StreamingHttpResponse(_status_stream(order_id), content_type='text/event-stream')
+        response['X-Accel-Buffering'] = 'no'  # Don't let nginx buffer the events
+    response['Cache-Control'] = 'no-cache'
+    return response
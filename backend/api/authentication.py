@@ -0,0 +1,137 @@
+"""
+Token authentication with a cache in front of the database.
+DRF's TokenAuthentication looks up the token (joined with its user) on every
+request. Here the result is remembered in a small in-process LRU cache, and
+optionally in Django's shared cache, so most requests skip that query.
+
+Only the user's id, username and is_active/is_staff/is_superuser flags are
+cached (never the password hash or other personal data); each request gets a
+fresh User built from them, whose other fields load from the database if
+something reads them.
+
+Entries are removed by signals (see api/signals.py) when a token is deleted
+(logout) or its user is saved (e.g. deactivated). Other worker processes hold
+their own in-process copies, which expire after TOKEN_CACHE_TTL seconds.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.db.models import DEFERRED
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from .caching import TTLCache
+
+token_cache = TTLCache(
+    max_entries=settings.TOKEN_CACHE_MAX_ENTRIES,
+    ttl=settings.TOKEN_CACHE_TTL,
+)
+
+
+def _shared_key(key):
+    """Shared cache key - a hash, so raw tokens are never stored as keys"""
+    return 'auth:token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def invalidate_token(key):
+    """Forget a cached token (in this process and the shared cache)"""
+    token_cache.delete(key)
+    if settings.TOKEN_CACHE_SHARED:
+        cache.delete(_shared_key(key))
+
+
+def invalidate_user(user):
+    """Forget every cached token of a user"""
+    for key in Token.objects.filter(user=user).values_list('key', flat=True):
+        invalidate_token(key)
+
+
+# User fields kept in the cache - what authentication and permissions need
+CACHED_USER_FIELDS = ('id', 'username', 'is_active', 'is_staff', 'is_superuser')
+
+
+def _entry(token):
+    """What is cached for a token: {field: value} of its user's CACHED_USER_FIELDS"""
+    return {field: getattr(token.user, field) for field in CACHED_USER_FIELDS}
+
+
+def _remember(key, entry):
+    token_cache.set(key, entry)
+    if settings.TOKEN_CACHE_SHARED:
+        cache.set(_shared_key(key), entry, settings.TOKEN_CACHE_TTL)
+
+
+def _credentials(key, entry):
+    """
+    (user, token) rebuilt from a cache entry, refusing inactive users.
+    New objects every time, so one request can't change another's user.
+    """
+    user_model = get_user_model()
+    # Fields that weren't cached are deferred: read from the database on first use
+    values = [entry.get(field.attname, DEFERRED) for field in user_model._meta.concrete_fields]
+    user = user_model.from_db(router.db_for_read(user_model), list(entry), values)
+    if not user.is_active:
+        raise AuthenticationFailed('User inactive or deleted.')
+    token = Token.from_db(router.db_for_read(Token), ['key', 'user_id'], [key, user.id])
+    token.user = user
+    return (user, token)
+
+
+async def aauthenticate(request):
+    """
+    Token authentication for async views (DRF authentication is sync only).
+    Returns (user, token), or None when no "Authorization: Token ..." header
+    was sent. Raises AuthenticationFailed like CachedTokenAuthentication.
+    """
+    header = request.headers.get('Authorization', '').split()
+    if not header or header[0].lower() != CachedTokenAuthentication.keyword.lower():
+        return None
+    # Same messages as DRF's TokenAuthentication
+    if len(header) == 1:
+        raise AuthenticationFailed('Invalid token header. No credentials provided.')
+    if len(header) > 2:
+        raise AuthenticationFailed('Invalid token header. Token string should not contain spaces.')
+    key = header[1]
+
+    entry = token_cache.get(key)
+    if entry is None and settings.TOKEN_CACHE_SHARED:
+        entry = await cache.aget(_shared_key(key))
+        if entry is not None:
+            token_cache.set(key, entry)
+    if entry is None:
+        try:
+            token = await Token.objects.select_related('user').aget(key=key)
+        except Token.DoesNotExist:
+            raise AuthenticationFailed('Invalid token.')
+        entry = _entry(token)
+        token_cache.set(key, entry)
+        if settings.TOKEN_CACHE_SHARED:
+            await cache.aset(_shared_key(key), entry, settings.TOKEN_CACHE_TTL)
+    return _credentials(key, entry)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in replacement for TokenAuthentication.
+    Clients still send: Authorization: Token <key>
+    """
+
+    def authenticate_credentials(self, key):
+        entry = token_cache.get(key)
+
+        if entry is None and settings.TOKEN_CACHE_SHARED:
+            entry = cache.get(_shared_key(key))
+            if entry is not None:
+                token_cache.set(key, entry)
+
+        if entry is None:
+            # Cache miss: normal database lookup (raises for bad/inactive tokens)
+            user, token = super().authenticate_credentials(key)
+            entry = _entry(token)
+            _remember(key, entry)
+
+        return _credentials(key, entry)
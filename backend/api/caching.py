@@ -0,0 +1,273 @@
+"""
+Versioned response caches.
+The menu only changes when an admin edits it, so instead of querying and
+serializing it on every request we keep the rendered JSON bytes in memory
+and rebuild them only after the version number has moved.
+Version numbers live in the database (the SnapshotVersion table), which every
+worker process shares, so a change made by any process reaches all of them.
+Each process remembers the versions it read for SNAPSHOT_VERSION_TTL seconds,
+so a cache hit usually costs no query at all; a change made by another
+process is picked up at most that long after it commits.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .renderers import render_json
+from .timing import record_phase
+
+
+def _new_version():
+    """A version number no process has used yet"""
+    return time.time_ns()
+
+
+def _read_versions(version_keys):
+    """Stored versions of `version_keys`, in one query"""
+    from .models import SnapshotVersion
+    return dict(SnapshotVersion.objects.filter(name__in=version_keys).values_list('name', 'version'))
+
+
+async def _aread_versions(version_keys):
+    from .models import SnapshotVersion
+    queryset = SnapshotVersion.objects.filter(name__in=version_keys).values_list('name', 'version')
+    return {name: version async for name, version in queryset}
+
+
+def _write_version(version_key, version):
+    """
+    Store a version with a single upsert (no read first, nothing to cull),
+    so a bump is one short write in its own transaction.
+    """
+    from .models import SnapshotVersion
+    table = connection.ops.quote_name(SnapshotVersion._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (name, version) VALUES (%s, %s) '
+            f'ON CONFLICT (name) DO UPDATE SET version = excluded.version',
+            [version_key, version],
+        )
+
+
+class Snapshot:
+    """
+    Pre-rendered JSON body together with its strong ETag.
+    """
+    __slots__ = ('body', 'etag')
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = '"%s"' % hashlib.md5(body).hexdigest()
+
+
+class VersionedSnapshotCache:
+    """
+    In-process cache of rendered snapshots keyed by a version counter.
+
+    The version counter lives in the database so that every worker sees a
+    bump, and is remembered in process memory for a moment (see the module
+    docstring). Snapshots themselves stay in process memory: a hit costs
+    two dict lookups, plus one query when the remembered versions expired.
+
+    An optional `scope` (e.g. a user id) gives that scope its own version,
+    so bumping one user's data leaves everyone else's snapshots valid.
+    A bump without a scope invalidates every scope as well; both versions
+    are read in one query.
+    Keeps hit/miss counters like TTLCache (reported by api/metrics.py).
+    """
+
+    def __init__(self, namespace, max_entries=256):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _version_key(self, scope):
+        if scope is None:
+            return f'{self.namespace}:version'
+        return f'{self.namespace}:version:{scope}'
+
+    def _version_keys(self, scope):
+        if scope is None:
+            return [self._version_key(None)]
+        return [self._version_key(None), self._version_key(scope)]
+
+    def version(self, scope=None):
+        """
+        Return the current version (a tuple: the global version, then the
+        scope's). A version that was never bumped is 0.
+        """
+        version_keys = self._version_keys(scope)
+        versions = _local_versions.get_many(version_keys)
+        if len(versions) < len(version_keys):
+            versions = _read_versions(version_keys)
+            _remember(version_keys, versions)
+        return tuple(versions.get(version_key, 0) for version_key in version_keys)
+
+    def bump(self, scope=None):
+        """Invalidate every snapshot (of one scope, if given)."""
+        version_key = self._version_key(scope)
+        version = _new_version()
+        _write_version(version_key, version)
+        # This process sees its own change at once, others within the TTL
+        _local_versions.set(version_key, version)
+        if scope is None:
+            with self._lock:
+                self._entries.clear()
+        # Entries of the old scope version simply age out of the LRU
+
+    def bump_on_commit(self, scope=None):
+        """
+        Bump once the current transaction commits.
+        Bumping earlier would let another request cache the old data
+        under the new version before our changes are visible to it.
+        """
+        transaction.on_commit(lambda: self.bump(scope))
+
+    def get_or_build(self, key, build, scope=None):
+        """
+        Return the snapshot for `key` at the current version.
+        `build` is called on a miss and must return JSON-serializable data.
+        """
+        entry_key = (scope, self.version(scope), key)
+        snapshot = self._lookup(entry_key)
+        if snapshot is None:
+            with record_phase('serialize'):
+                data = build()
+            snapshot = self._store(entry_key, data)
+        return snapshot
+
+    async def aversion(self, scope=None):
+        """version() for async views"""
+        version_keys = self._version_keys(scope)
+        versions = _local_versions.get_many(version_keys)
+        if len(versions) < len(version_keys):
+            versions = await _aread_versions(version_keys)
+            _remember(version_keys, versions)
+        return tuple(versions.get(version_key, 0) for version_key in version_keys)
+
+    async def aget_or_build(self, key, build, scope=None):
+        """get_or_build() for async views; `build` is an async function"""
+        entry_key = (scope, await self.aversion(scope), key)
+        snapshot = self._lookup(entry_key)
+        if snapshot is None:
+            with record_phase('serialize'):
+                data = await build()
+            snapshot = self._store(entry_key, data)
+        return snapshot
+
+    def clear(self):
+        """Drop this process's snapshots (the versions stay as they are)"""
+        with self._lock:
+            self._entries.clear()
+
+    def _lookup(self, entry_key):
+        with self._lock:
+            snapshot = self._entries.get(entry_key)
+            if snapshot is not None:
+                self._entries.move_to_end(entry_key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return snapshot
+
+    def _store(self, entry_key, data):
+        snapshot = Snapshot(render_json(data))
+        with self._lock:
+            self._entries[entry_key] = snapshot
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return snapshot
+
+
+class TTLCache:
+    """
+    Small thread-safe LRU dict whose entries expire after `ttl` seconds.
+    Keeps hit/miss counters so the hit ratio can be reported.
+    """
+
+    def __init__(self, max_entries=10000, ttl=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value, or None if missing or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get_many(self, keys):
+        """Return {key: value} for the keys that are cached and fresh"""
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Versions read from the database, shared by every cache of this process
+_local_versions = TTLCache(max_entries=100000, ttl=settings.SNAPSHOT_VERSION_TTL)
+
+
+def _remember(version_keys, versions):
+    for version_key in version_keys:
+        _local_versions.set(version_key, versions.get(version_key, 0))
+
+
+# Cache for everything derived from FoodItem rows
+menu_cache = VersionedSnapshotCache('menu')
+
+# Search results; shares the menu's version so menu edits invalidate it,
+# but has its own LRU so many different queries can't push out the menu
+search_cache = VersionedSnapshotCache('menu', max_entries=1024)
+
+# Cache for order history pages, one version per user
+order_cache = VersionedSnapshotCache('orders', max_entries=2048)
+
+
+def clear_local_caches():
+    """
+    Forget this process's snapshots and remembered versions. For tests:
+    their database changes, versions included, are rolled back.
+    """
+    _local_versions.clear()
+    for cache in (menu_cache, search_cache, order_cache):
+        cache.clear()
@@ -0,0 +1,189 @@
+"""
+Cart helpers shared by the cart views.
+Quantity changes are done inside the database (UPDATE ... SET quantity =
+quantity + n) so two requests arriving at the same time never overwrite
+each other's increments.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import CartItem, FoodItem
+
+
+def parse_quantity(value, default=1):
+    """
+    Return `value` as a positive int, or None if it is not one.
+    Accepts ints and digit strings (form data), rejects floats and booleans.
+    """
+    if value is None:
+        value = default
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        return None
+    return value
+
+
+# UPDATE-or-INSERT rounds before add_to_cart() gives up
+MAX_ADD_ATTEMPTS = 3
+
+
+def add_to_cart(user, food, quantity):
+    """
+    Atomically add `quantity` of `food` to the user's cart.
+    Returns (cart_item, created).
+
+    Common case (item already in cart) is one UPDATE and a re-read. Otherwise we
+    INSERT, and if another request inserted the same row first the unique
+    constraint fails and we go back to the UPDATE. That only repeats if the
+    row is deleted again in between, so it is bounded rather than a loop
+    that could spin.
+    """
+    for _ in range(MAX_ADD_ATTEMPTS):
+        cart_item = _increment(user, food, quantity)
+        if cart_item is not None:
+            return cart_item, False
+        try:
+            with transaction.atomic():
+                cart_item = CartItem.objects.create(user=user, food=food, quantity=quantity)
+            return cart_item, True
+        except IntegrityError:
+            pass  # Lost the race to insert - the row exists now, so increment it
+    raise IntegrityError('Cart item kept being added and removed concurrently')
+
+
+def _increment(user, food, quantity):
+    """
+    UPDATE the existing row in place and return it with its final quantity,
+    or None if the food isn't in the cart.
+    The row is re-read in the UPDATE's transaction, which holds the row's
+    lock, so a concurrent delete can't remove it in between.
+    """
+    with transaction.atomic():
+        updated = CartItem.objects.filter(user=user, food=food).update(
+            quantity=F('quantity') + quantity
+        )
+        if not updated:
+            return None
+        cart_item = CartItem.objects.get(user=user, food=food)
+    cart_item.food = food  # Already loaded, avoid a second query
+    return cart_item
+
+
+class CartBatchError(Exception):
+    """Raised when a batch of cart operations is invalid (nothing is applied)"""
+
+
+MAX_BATCH_OPERATIONS = 100
+
+
+def apply_batch(user, operations):
+    """
+    Apply a list of cart operations in one transaction.
+
+    Each operation is a dict:
+        {"op": "add", "food_id": 1, "quantity": 2}     - add to quantity
+        {"op": "set", "item_id": 5, "quantity": 3}     - set quantity (0 removes)
+        {"op": "remove", "item_id": 5}                 - remove from cart
+    "set" and "remove" accept either item_id (cart item) or food_id.
+
+    Operations are applied in order to an in-memory copy of the cart and the
+    net result is written with at most one bulk INSERT, one bulk UPDATE and
+    one DELETE. Raises CartBatchError if any operation is invalid.
+    """
+    if not isinstance(operations, list) or not operations:
+        raise CartBatchError('operations must be a non-empty list')
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise CartBatchError(f'At most {MAX_BATCH_OPERATIONS} operations per batch')
+
+    parsed = [_parse_operation(index, operation) for index, operation in enumerate(operations)]
+
+    with transaction.atomic():
+        existing = {
+            cart_item.food_id: cart_item
+            for cart_item in CartItem.objects.select_for_update().filter(user=user)
+        }
+        food_by_item_id = {cart_item.id: food_id for food_id, cart_item in existing.items()}
+
+        # Foods referenced by id that are not in the cart yet must exist
+        new_food_ids = {
+            key for _, op, kind, key, _ in parsed if kind == 'food_id' and key not in existing
+        }
+        known_food_ids = set(
+            FoodItem.objects.filter(id__in=new_food_ids).values_list('id', flat=True)
+        )
+
+        # Fold the operations into the final {food_id: quantity} state
+        quantities = {food_id: cart_item.quantity for food_id, cart_item in existing.items()}
+        for index, op, kind, key, quantity in parsed:
+            if kind == 'item_id':
+                if key not in food_by_item_id:
+                    raise CartBatchError(f'Operation {index}: cart item {key} not found')
+                food_id = food_by_item_id[key]
+            else:
+                if key not in existing and key not in known_food_ids:
+                    raise CartBatchError(f'Operation {index}: food item {key} not found')
+                food_id = key
+
+            if op == 'add':
+                quantities[food_id] = quantities.get(food_id, 0) + quantity
+            elif op == 'set':
+                quantities[food_id] = quantity
+            else:  # remove
+                quantities[food_id] = 0
+
+        to_create, to_update, to_delete = [], [], []
+        for food_id, quantity in quantities.items():
+            cart_item = existing.get(food_id)
+            if cart_item is None:
+                if quantity > 0:
+                    to_create.append(CartItem(user=user, food_id=food_id, quantity=quantity))
+            elif quantity == 0:
+                to_delete.append(cart_item.id)
+            elif quantity != cart_item.quantity:
+                cart_item.quantity = quantity
+                to_update.append(cart_item)
+
+        if to_create:
+            CartItem.objects.bulk_create(to_create)
+        if to_update:
+            CartItem.objects.bulk_update(to_update, ['quantity'])
+        if to_delete:
+            CartItem.objects.filter(id__in=to_delete).delete()
+
+
+def _parse_operation(index, operation):
+    """Validate one operation -> (index, op, 'food_id' | 'item_id', id, quantity)"""
+    if not isinstance(operation, dict):
+        raise CartBatchError(f'Operation {index}: must be an object')
+
+    op = operation.get('op')
+    if op not in ('add', 'set', 'remove'):
+        raise CartBatchError(f'Operation {index}: op must be add, set or remove')
+
+    if op == 'add':
+        kinds = ['food_id']
+    else:
+        kinds = [kind for kind in ('item_id', 'food_id') if kind in operation]
+        if len(kinds) != 1:
+            raise CartBatchError(f'Operation {index}: give exactly one of item_id or food_id')
+    kind = kinds[0]
+    key = parse_quantity(operation.get(kind), default=None)  # ids are positive ints too
+    if key is None:
+        raise CartBatchError(f'Operation {index}: invalid {kind}')
+
+    quantity = 0
+    if op == 'add':
+        quantity = parse_quantity(operation.get('quantity', 1))
+        if quantity is None:
+            raise CartBatchError(f'Operation {index}: invalid quantity')
+    elif op == 'set':
+        raw = operation.get('quantity')
+        if raw in (0, '0') and not isinstance(raw, bool):
+            quantity = 0  # Setting 0 removes the item
+        else:
+            quantity = parse_quantity(raw, default=None)
+            if quantity is None:
+                raise CartBatchError(f'Operation {index}: invalid quantity')
+
+    return index, op, kind, key, quantity
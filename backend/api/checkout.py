@@ -0,0 +1,82 @@
+"""
+Checkout service - turns a user's cart into an order.
+Everything happens inside one transaction: either the order, all of its
+items and the cleared cart are saved together, or nothing is.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+
+from .models import CartItem, Order, OrderItem
+from .timing import PhaseTimer
+
+logger = logging.getLogger(__name__)
+
+
+class EmptyCartError(Exception):
+    """Raised when the user tries to check out an empty cart"""
+
+
+def place_order(user):
+    """
+    Create an Order from the user's cart and clear the cart.
+    Returns (order, timer) where timer.timings holds per-phase milliseconds.
+    Raises EmptyCartError if there is nothing in the cart.
+
+    Round-trips do not grow with cart size:
+      lock  - one SELECT ... FOR UPDATE of the cart rows joined with food
+      price - total and line prices computed in Python in a single pass
+      write - one INSERT for the order, one bulk INSERT for its items,
+              one DELETE for the cart
+      load  - one SELECT for the items to return in the response
+    """
+    timer = PhaseTimer()
+
+    with transaction.atomic():
+        with timer.phase('lock'):
+            # Lock only the cart rows (not the food rows they join to), so two
+            # checkouts of the same cart cannot both succeed. SQLite ignores
+            # this and relies on its database-wide write lock instead.
+            cart_items = list(
+                CartItem.objects.select_for_update(of=('self',))
+                .filter(user=user)
+                .select_related('food')
+            )
+
+        if not cart_items:
+            raise EmptyCartError()
+
+        with timer.phase('price'):
+            # Snapshot the current price, name and image of every line
+            # (order history never reads the menu again) and add up the total
+            total_price = 0
+            order_items = []
+            for cart_item in cart_items:
+                food = cart_item.food
+                total_price += food.price * cart_item.quantity
+                order_items.append(OrderItem(
+                    food=food,
+                    food_name=food.name,
+                    food_image=food.image.name or '',
+                    quantity=cart_item.quantity,
+                    price=food.price
+                ))
+
+        with timer.phase('write'):
+            order = Order.objects.create(user=user, total_price=total_price)
+            for order_item in order_items:
+                order_item.order = order
+            OrderItem.objects.bulk_create(order_items)
+            # Only delete the rows we locked; anything added meanwhile stays
+            CartItem.objects.filter(id__in=[item.id for item in cart_items]).delete()
+
+    with timer.phase('load'):
+        prefetch_related_objects([order], Prefetch('items', queryset=OrderItem.objects.order_by('id')))
+
+    logger.info(
+        'checkout order=%s lines=%d %s',
+        order.id, len(order_items),
+        ' '.join(f'{name}_ms={ms:.2f}' for name, ms in timer.timings.items())
+    )
+    return order, timer
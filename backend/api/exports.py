@@ -0,0 +1,161 @@
+"""
+Order export for finance / reporting, as CSV or JSON Lines.
+
+One row per order line, oldest order first:
+    order_id, created_at, user_id, username, status, order_total,
+    item_id, food_id, food_name, quantity, unit_price, line_total
+
+Rows are produced by generators that read the database in chunks
+(QuerySet.iterator) with the order and user joined in, so exporting a
+month or a year costs the same memory and one query per chunk. food_name
+is the name at the time of the order; food_id is empty for dishes that
+have since been deleted.
+Used by GET /api/orders/export/ (streamed to the browser, under WSGI or
+ASGI) and by `python manage.py export_orders` (written to a file).
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import OrderItem
+
+COLUMNS = [
+    'order_id', 'created_at', 'user_id', 'username', 'status', 'order_total',
+    'item_id', 'food_id', 'food_name', 'quantity', 'unit_price', 'line_total',
+]
+
+FORMATS = {
+    # name: (content type, file extension)
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+}
+
+# Rows fetched from the database at a time
+CHUNK_SIZE = 2000
+
+# Rows joined into one piece of output (fewer, larger writes to the socket)
+ROWS_PER_WRITE = 500
+
+
+def parse_date_range(start=None, end=None):
+    """
+    Turn 'YYYY-MM-DD' start/end dates (both included, either may be empty)
+    into (from datetime, until datetime) in the current time zone.
+    Raises ValueError for a malformed date or an end before the start.
+    """
+    bounds = []
+    for name, value in (('start', start), ('end', end)):
+        if not value:
+            bounds.append(None)
+            continue
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is None:
+            raise ValueError(f'Invalid {name} date "{value}", expected YYYY-MM-DD')
+        bounds.append(day)
+
+    start_day, end_day = bounds
+    if start_day and end_day and end_day < start_day:
+        raise ValueError('end must not be before start')
+    since = timezone.make_aware(datetime.combine(start_day, time.min)) if start_day else None
+    # The whole end day is included
+    until = timezone.make_aware(datetime.combine(end_day + timedelta(days=1), time.min)) if end_day else None
+    return since, until
+
+
+def order_lines(since=None, until=None, chunk_size=CHUNK_SIZE):
+    """Order lines of orders placed in [since, until), oldest first, read chunk by chunk"""
+    lines = OrderItem.objects.select_related('order__user').only(
+        'id', 'food_id', 'food_name', 'quantity', 'price',
+        'order__id', 'order__created_at', 'order__status', 'order__total_price',
+        'order__user__id', 'order__user__username',
+    )
+    if since:
+        lines = lines.filter(order__created_at__gte=since)
+    if until:
+        lines = lines.filter(order__created_at__lt=until)
+    return lines.order_by('order__created_at', 'order_id', 'id').iterator(chunk_size=chunk_size)
+
+
+def export_rows(since=None, until=None, chunk_size=CHUNK_SIZE):
+    """One list of COLUMNS values (all strings or ints) per order line"""
+    for line in order_lines(since, until, chunk_size):
+        order = line.order
+        yield [
+            order.id,
+            order.created_at.isoformat(),
+            order.user.id,
+            order.user.username,
+            order.status,
+            str(order.total_price),
+            line.id,
+            line.food_id if line.food_id is not None else '',
+            line.food_name,
+            line.quantity,
+            str(line.price),
+            str(line.price * line.quantity),
+        ]
+
+
+class _Echo:
+    """File-like object whose write() returns what it was given (for csv.writer)"""
+
+    def write(self, value):
+        return value
+
+
+def _grouped(pieces):
+    """Join every ROWS_PER_WRITE pieces of text into one"""
+    group = []
+    for piece in pieces:
+        group.append(piece)
+        if len(group) >= ROWS_PER_WRITE:
+            yield ''.join(group)
+            group = []
+    if group:
+        yield ''.join(group)
+
+
+def csv_lines(rows):
+    """CSV text (header first) for export_rows(), in pieces"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(COLUMNS)
+    yield from _grouped(writer.writerow(row) for row in rows)
+
+
+def jsonl_lines(rows):
+    """JSON Lines text for export_rows() - one {column: value} object per line"""
+    yield from _grouped(json.dumps(dict(zip(COLUMNS, row))) + '\n' for row in rows)
+
+
+def render(rows, file_format):
+    """Text pieces of `rows` in 'csv' or 'jsonl'"""
+    return csv_lines(rows) if file_format == 'csv' else jsonl_lines(rows)
+
+
+async def streamed_async(pieces):
+    """
+    Hand the pieces to an ASGI server one at a time. Given a plain generator,
+    Django 4.2 under ASGI reads it completely into memory before sending
+    anything. Each piece is made in the sync thread, where the database
+    connection lives.
+    """
+    next_piece = sync_to_async(next)
+    pieces = iter(pieces)
+    while True:
+        piece = await next_piece(pieces, None)
+        if piece is None:
+            return
+        yield piece
+
+
+def filename(file_format, start=None, end=None):
+    """e.g. orders-2026-09-01-to-2026-09-30.csv"""
+    span = f"-{start or 'start'}-to-{end or 'now'}" if start or end else ''
+    return f'orders{span}.{FORMATS[file_format][1]}'
@@ -0,0 +1,172 @@
+"""
+Fast read-only versions of FoodItemSerializer, CartItemSerializer and
+OrderSerializer for the list endpoints.
+
+A ModelSerializer builds and runs a field object for every field of every
+row, and loads full model instances first. For a 1000-item menu that is
+most of the request's CPU time. These functions instead read only the
+needed columns with .values() and build the dicts directly.
+
+The output must stay exactly the same as the DRF serializers' (the ETags
+depend on it): same keys in the same order, prices and dates formatted the
+way the DRF fields do, image URLs from the same helpers. When you add a field
+to one of the serializers, add it here too.
+
+Turned off with FAST_SERIALIZERS=false (the views then use the DRF serializers).
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .models import CartItem, OrderItem
+from .serializers import image_variant_urls, media_url
+
+CENTS = Decimal('0.01')
+
+
+def _price(value):
+    """Same as the DecimalField(max_digits=10, decimal_places=2) of the serializers"""
+    return '{:f}'.format(value.quantize(CENTS))
+
+
+def _datetime(value, tz):
+    """Same as DRF's DateTimeField (ISO 8601, USE_TZ); tz = the current time zone"""
+    value = value.astimezone(tz).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+# Other DRF settings: format with the DRF fields themselves (slower, same output)
+if not api_settings.COERCE_DECIMAL_TO_STRING:
+    _price = serializers.DecimalField(max_digits=10, decimal_places=2).to_representation
+if (api_settings.DATETIME_FORMAT or '').lower() != ISO_8601 or not settings.USE_TZ:
+    _datetime_field = serializers.DateTimeField()
+
+    def _datetime(value, tz):
+        return _datetime_field.to_representation(value)
+
+
+def _context(context):
+    """Look up the current time zone once per response, not once per row"""
+    context.setdefault('timezone', timezone.get_current_timezone())
+    return context
+
+
+FOOD_COLUMNS = ('id', 'name', 'description', 'price', 'image', 'image_variants', 'created_at')
+
+
+def _related_columns(prefix):
+    """FOOD_COLUMNS as seen through a foreign key, e.g. 'food__name'"""
+    return tuple(f'{prefix}__{column}' for column in FOOD_COLUMNS)
+
+
+def _food(id, name, description, price, image, image_variants, created_at, context):
+    """Same dict as FoodItemSerializer(food).data"""
+    return {
+        'id': id,
+        'name': name,
+        'description': description,
+        'price': _price(price),
+        'image': media_url(image, context) if image else None,
+        'image_variants': image_variant_urls(image, image_variants, context),
+        'created_at': _datetime(created_at, context['timezone']),
+    }
+
+
+def food_rows(queryset):
+    """The columns food_list_data() needs; keeps the queryset's filters and order"""
+    return queryset.values(*FOOD_COLUMNS)
+
+
+def food_list_data(rows, context):
+    """Same as FoodItemSerializer(foods, many=True).data, from food_rows() rows"""
+    context = _context(context)
+    return [_food(*[row[column] for column in FOOD_COLUMNS], context) for row in rows]
+
+
+CART_COLUMNS = ('id', 'quantity', 'created_at') + _related_columns('food')
+
+
+def cart_rows(user):
+    """A user's cart lines joined with their food, as cart_items_data() needs them"""
+    return CartItem.objects.filter(user=user).values_list(*CART_COLUMNS)
+
+
+def cart_data(user, context):
+    """
+    Same as CartItemSerializer(cart_items, many=True).data for a user's cart,
+    plus the cart total. Returns (items, total).
+    """
+    return cart_items_data(cart_rows(user), context)
+
+
+def cart_items_data(rows, context):
+    """cart_data() from already fetched cart_rows() (used by the async views)"""
+    context = _context(context)
+    items = []
+    total = 0
+    for item_id, quantity, created_at, *food in rows:
+        items.append({
+            'id': item_id,
+            'food': _food(*food, context),
+            'quantity': quantity,
+            'created_at': _datetime(created_at, context['timezone']),
+        })
+        total += food[3] * quantity  # food price
+    return items, total
+
+
+ORDER_COLUMNS = ('id', 'user', 'total_price', 'status', 'created_at')
+ORDER_ITEM_COLUMNS = ('id', 'order_id', 'food_id', 'food_name', 'food_image', 'quantity', 'price')
+
+
+def order_rows(queryset):
+    """The columns order_list_data() needs; keeps the queryset's filters and order"""
+    return queryset.values(*ORDER_COLUMNS)
+
+
+def order_item_rows(order_ids):
+    """Items of the given orders (their name/image snapshots - no join with the menu)"""
+    # Same order as the Prefetch in views._orders_with_items()
+    return OrderItem.objects.filter(order_id__in=order_ids).order_by('id').values_list(*ORDER_ITEM_COLUMNS)
+
+
+def order_list_data(rows, context):
+    """
+    Same as OrderSerializer(orders, many=True).data, from order_rows() rows.
+    All items of all the orders are read in one query.
+    """
+    rows = list(rows)
+    item_rows = order_item_rows([row['id'] for row in rows]) if rows else []
+    return orders_with_items_data(rows, item_rows, context)
+
+
+def orders_with_items_data(rows, item_rows, context):
+    """order_list_data() from already fetched rows (used by the async views)"""
+    context = _context(context)
+    orders = [
+        {
+            'id': row['id'],
+            'user': row['user'],
+            'total_price': _price(row['total_price']),
+            'status': row['status'],
+            'created_at': _datetime(row['created_at'], context['timezone']),
+            'items': [],
+        }
+        for row in rows
+    ]
+    by_id = {order['id']: order['items'] for order in orders}
+    for item_id, order_id, food_id, food_name, food_image, quantity, price in item_rows:
+        by_id[order_id].append({
+            'id': item_id,
+            'food': food_id,
+            'name': food_name,
+            'image': media_url(food_image, context) if food_image else None,
+            'quantity': quantity,
+            'price': _price(price),
+        })
+    return orders
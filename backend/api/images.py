@@ -0,0 +1,98 @@
+"""
+Responsive image variants for food photos.
+When an image is uploaded we make smaller copies (and WebP versions) so the
+frontend can download a 400px image for a 200px card instead of the original
+multi-megabyte photo.
+
+Variant files are named after a hash of the original's content, e.g.
+    food_images/variants/3f2a9c1b7d4e-400w.webp
+so a changed photo always gets new URLs (safe to cache forever).
+"""
+import hashlib
+import io
+import logging
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+# Widths to generate (px); covers 1x and 2x screens for cards and detail page
+VARIANT_WIDTHS = [200, 400, 800]
+
+VARIANT_DIR = 'food_images/variants'
+
+FORMATS = {
+    # name: (Pillow format, file extension, save options)
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+}
+
+
+def available_formats():
+    """WebP support depends on how Pillow was built"""
+    return [name for name in FORMATS if name != 'webp' or features.check('webp')]
+
+
+def needs_variants(food):
+    """True if the food has an image whose variants are missing or outdated"""
+    if not food.image:
+        return bool(food.image_variants)
+    return food.image_variants.get('source') != food.image.name
+
+
+def generate_variants(food):
+    """
+    Create resized JPEG/WebP copies of food.image and return the metadata dict
+    stored in FoodItem.image_variants:
+        {"source": <image name>, "hash": ..., "jpeg": [{"width": 200, "name": ...}, ...], "webp": [...]}
+    Returns {} if the food has no image.
+    """
+    if not food.image:
+        return {}
+
+    with food.image.open('rb') as source:
+        original = source.read()
+    digest = hashlib.sha256(original).hexdigest()[:12]
+
+    image = Image.open(io.BytesIO(original))
+    image = ImageOps.exif_transpose(image)  # Respect camera rotation
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+
+    # Never upscale; always produce at least one (the smallest) size
+    widths = [width for width in VARIANT_WIDTHS if width < image.width] or [min(image.width, VARIANT_WIDTHS[0])]
+
+    variants = {'source': food.image.name, 'hash': digest}
+    for format_name in available_formats():
+        pillow_format, extension, options = FORMATS[format_name]
+        variants[format_name] = []
+        for width in widths:
+            name = f'{VARIANT_DIR}/{digest}-{width}w.{extension}'
+            if not default_storage.exists(name):
+                height = round(image.height * width / image.width)
+                resized = image.resize((width, height), Image.LANCZOS)
+                buffer = io.BytesIO()
+                resized.save(buffer, pillow_format, **options)
+                default_storage.save(name, ContentFile(buffer.getvalue()))
+            variants[format_name].append({'width': width, 'name': name})
+    return variants
+
+
+def refresh_variants(food):
+    """
+    Generate variants if needed and store them without sending signals again.
+    Returns True if anything changed. Errors are logged, never raised, so a
+    broken upload can't stop the food item from being saved.
+    """
+    if not needs_variants(food):
+        return False
+    try:
+        variants = generate_variants(food)
+    except Exception:
+        logger.exception('Could not create image variants for food %s', food.pk)
+        return False
+    food.image_variants = variants
+    type(food).objects.filter(pk=food.pk).update(image_variants=variants)
+    return True
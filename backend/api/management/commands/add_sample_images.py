@@ -39,7 +39,9 @@ class Command(BaseCommand):
         self.stdout.write('3. Name them descriptively (e.g., pizza-margherita.jpg)')
         self.stdout.write('4. Go to Django Admin (http://127.0.0.1:8000/admin/)')
         self.stdout.write('5. Login and edit each Food Item to upload its image')
-        self.stdout.write('\nOR use the Django shell to set images programmatically.')
+        self.stdout.write('\nOR import many at once: put the photos in a folder and run')
+        self.stdout.write('  python manage.py import_menu menu.csv --images <folder>')
+        self.stdout.write('  (menu.csv has sku,name,description,price,image columns)')
         
         self.stdout.write(self.style.SUCCESS('\nMedia directory location:'))
         self.stdout.write(f'  {media_dir}')
@@ -0,0 +1,98 @@
+"""
+Management command to check that the hot queries use their indexes.
+Runs EXPLAIN on each query and fails if the expected index is not in the plan.
+
+Run: python manage.py check_query_plans
+     python manage.py check_query_plans --verbose   (print every plan)
+
+On PostgreSQL the planner may still pick a sequential scan on small tables,
+because that is cheaper there. The check therefore turns off sequential scans
+for its own transaction, which shows whether the index *can* serve the query,
+the plan it will pick once the tables hold millions of rows.
+"""
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from api.models import CartItem, FoodItem, Order
+
+
+def hot_queries():
+    """(description, queryset, index names that may serve it)"""
+    now = timezone.now()
+    user_id = User.objects.values_list('id', flat=True).first() or 1
+    return [
+        (
+            'food_list: whole menu, newest first',
+            FoodItem.objects.all(),
+            ['fooditem_created_idx'],
+        ),
+        (
+            'food_list: cursor page',
+            FoodItem.objects.filter(
+                Q(created_at__lte=now), Q(created_at__lt=now) | Q(id__lt=100)
+            ).order_by('-created_at', '-id')[:21],
+            ['fooditem_created_idx'],
+        ),
+        (
+            'food lookup by name',
+            FoodItem.objects.filter(name='Margherita Pizza'),
+            ['fooditem_name_idx'],
+        ),
+        (
+            'cart_view: cart items of one user',
+            CartItem.objects.filter(user_id=user_id).select_related('food'),
+            # The user foreign key index or the unique (user, food) index;
+            # both names are generated by Django and start like this
+            ['api_cartitem_user_id', 'sqlite_autoindex_api_cartitem'],
+        ),
+        (
+            'cart_update: one cart item of one user',
+            CartItem.objects.filter(id=1, user_id=user_id),
+            ['pkey', 'PRIMARY KEY', 'INTEGER PRIMARY KEY'],
+        ),
+        (
+            'order history: orders of one user, newest first',
+            Order.objects.filter(user_id=user_id).order_by('-created_at', '-id')[:21],
+            ['order_user_created_idx'],
+        ),
+        (
+            'orders by date (admin / export)',
+            Order.objects.filter(created_at__gte=now).order_by('-created_at', '-id')[:100],
+            ['order_created_idx'],
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Checks (with EXPLAIN) that the hot queries use their indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose', action='store_true', help='print every query plan')
+
+    def handle(self, *args, **options):
+        failures = []
+
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for description, queryset, index_names in hot_queries():
+                plan = queryset.explain()
+                uses_index = any(name in plan for name in index_names)
+
+                if uses_index:
+                    self.stdout.write(self.style.SUCCESS(f'✓ {description}'))
+                else:
+                    self.stdout.write(self.style.ERROR(f'✗ {description}'))
+                    failures.append(description)
+                if options['verbose'] or not uses_index:
+                    for line in plan.splitlines():
+                        self.stdout.write(f'    {line}')
+
+        if failures:
+            raise CommandError(f'{len(failures)} hot queries do not use their index')
+        self.stdout.write(self.style.SUCCESS('\nAll hot queries use their indexes!'))
@@ -0,0 +1,57 @@
+"""
+Management command to export order lines for reporting (CSV or JSON Lines).
+Same rows as GET /api/orders/export/ (see api/exports.py), without an HTTP
+request that could time out - use it for large ranges.
+
+Run:
+    python manage.py export_orders --start 2026-09-01 --end 2026-09-30 -o september.csv
+    python manage.py export_orders --format jsonl > all-orders.jsonl
+"""
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import exports
+
+
+class Command(BaseCommand):
+    help = 'Writes order lines in a date range to a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='first day, YYYY-MM-DD (default: first order)')
+        parser.add_argument('--end', help='last day, YYYY-MM-DD, included (default: today)')
+        parser.add_argument('--format', choices=list(exports.FORMATS), default='csv')
+        parser.add_argument('-o', '--output', help='file to write (default: standard output)')
+        parser.add_argument('--chunk-size', type=int, default=exports.CHUNK_SIZE,
+                            help='rows read from the database at a time')
+
+    def handle(self, *args, **options):
+        try:
+            since, until = exports.parse_date_range(options['start'], options['end'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        started = time.perf_counter()
+        count = 0
+
+        def counted(rows):
+            nonlocal count
+            for row in rows:
+                count += 1
+                yield row
+
+        rows = counted(exports.export_rows(since, until, options['chunk_size']))
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as file:
+                for piece in exports.render(rows, options['format']):
+                    file.write(piece)
+        else:
+            for piece in exports.render(rows, options['format']):
+                sys.stdout.write(piece)
+
+        # Progress goes to stderr so it never ends up in the exported data
+        elapsed = time.perf_counter() - started
+        self.stderr.write(self.style.SUCCESS(
+            f'Exported {count:,} order lines in {elapsed:.1f}s ({count / max(elapsed, 1e-9):,.0f} rows/s)'
+        ))
@@ -0,0 +1,32 @@
+"""
+Management command to create resized/WebP copies of food images.
+New uploads get them automatically; run this once for images that were
+uploaded before, or with --force after changing the sizes in api/images.py.
+Run: python manage.py generate_image_variants [--force]
+"""
+from django.core.management.base import BaseCommand
+
+from api.caching import menu_cache
+from api.images import refresh_variants
+from api.models import FoodItem
+
+
+class Command(BaseCommand):
+    help = 'Creates thumbnail and WebP variants for food images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='regenerate even if up to date')
+
+    def handle(self, *args, **options):
+        updated = 0
+        foods = FoodItem.objects.exclude(image='').exclude(image__isnull=True)
+        for food in foods.iterator(chunk_size=200):
+            if options['force']:
+                food.image_variants = {}  # Makes refresh_variants() redo it
+            if refresh_variants(food):
+                updated += 1
+                self.stdout.write(f'  {food.id}. {food.name}')
+
+        if updated:
+            menu_cache.bump()  # update() skips signals, so refresh the menu ourselves
+        self.stdout.write(self.style.SUCCESS(f'\nCreated variants for {updated} food items'))
@@ -0,0 +1,219 @@
+"""
+Management command to import a menu (create or update food items) from a file.
+
+Run:
+    python manage.py import_menu menu.csv --images ./photos
+    python manage.py import_menu menu.jsonl
+    cat menu.csv | python manage.py import_menu - --format csv
+
+Each row (a CSV row with a header line, or one JSON object per line) has:
+    sku          the restaurant's item code - rows with a known sku update that item
+    name, price  required
+    description  optional; existing items keep theirs if the row has no such column
+    image        optional file name inside --images; copied to media and
+                 resized (api/images.py). Rows without one keep their current image.
+
+The file is read in batches of --batch-size rows, so memory use doesn't grow
+with the file. Each batch is one upsert (bulk_create with update_conflicts);
+images of a batch are copied and resized in parallel by --workers threads.
+Bad rows are reported with their line number and skipped.
+"""
+import csv
+import hashlib
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api import images, search
+from api.caching import menu_cache
+from api.models import FoodItem
+
+logger = logging.getLogger(__name__)
+
+# Where imported photos are stored (under MEDIA_ROOT)
+IMPORT_DIR = 'food_images/imports'
+
+# Columns written on update; optional columns only for rows that have them
+UPDATE_FIELDS = ['name', 'price']
+OPTIONAL_FIELDS = ['description']
+IMAGE_FIELDS = ['image', 'image_variants']
+
+
+class Command(BaseCommand):
+    help = 'Creates or updates food items from a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSON Lines file, or - for standard input')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='default: from the file extension')
+        parser.add_argument('--images', help='directory the "image" column refers to')
+        parser.add_argument('--batch-size', type=int, default=1000, help='rows per upsert')
+        parser.add_argument('--workers', type=int, default=8, help='threads for copying and resizing images')
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or self.guess_format(options['path'])
+        self.images_dir = Path(options['images']) if options['images'] else None
+        if self.images_dir and not self.images_dir.is_dir():
+            raise CommandError(f'Image directory not found: {self.images_dir}')
+
+        self.counts = {'created': 0, 'updated': 0, 'skipped': 0, 'images': 0}
+        started = time.perf_counter()
+        rows_read = 0
+
+        with self.open(options['path']) as file, ThreadPoolExecutor(options['workers']) as pool:
+            rows = self.read_rows(file, file_format)
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                rows_read += len(batch)
+                foods = self.build_foods(batch)
+                # Copy and resize the images of this batch in parallel (no database access)
+                with_files = [food for food in foods if food.image_file]
+                for food, attached in zip(with_files, pool.map(self.attach_image, with_files)):
+                    food.has_new_image = attached
+                self.upsert(foods)
+
+                rate = rows_read / (time.perf_counter() - started)
+                self.stdout.write(f'  {rows_read:,} rows ({rate:,.0f} rows/s)', ending='\r')
+
+        # bulk_create() sends no signals: refresh the search index and menu cache ourselves
+        if self.counts['created'] or self.counts['updated']:
+            search.rebuild_index()
+            menu_cache.bump()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {rows_read:,} rows in {elapsed:.1f}s ({rows_read / max(elapsed, 1e-9):,.0f} rows/s): "
+            f"{self.counts['created']:,} created, {self.counts['updated']:,} updated, "
+            f"{self.counts['skipped']:,} skipped, {self.counts['images']:,} images"
+        ))
+
+    def guess_format(self, path):
+        suffix = Path(path).suffix.lower()
+        if suffix == '.csv':
+            return 'csv'
+        if suffix in ('.jsonl', '.ndjson'):
+            return 'jsonl'
+        raise CommandError('Cannot tell the file format - use --format csv or --format jsonl')
+
+    def open(self, path):
+        if path == '-':
+            # Don't let the with-block close sys.stdin
+            return open(sys.stdin.fileno(), encoding='utf-8-sig', newline='', closefd=False)
+        try:
+            return open(path, encoding='utf-8-sig', newline='')
+        except OSError as e:
+            raise CommandError(f'Cannot open {path}: {e}')
+
+    def read_rows(self, file, file_format):
+        """Yield (line number, dict) one row at a time"""
+        if file_format == 'csv':
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                self.skip(line_number, f'invalid JSON ({e})')
+                continue
+            if isinstance(row, dict):
+                yield line_number, row
+            else:
+                self.skip(line_number, 'expected a JSON object')
+
+    def skip(self, line_number, reason):
+        self.counts['skipped'] += 1
+        self.stderr.write(f'  line {line_number}: {reason} - skipped')
+
+    def build_foods(self, batch):
+        """Validated, unsaved FoodItems for a batch of rows (the last row wins for a repeated sku)"""
+        foods = {}
+        for line_number, row in batch:
+            sku = str(row.get('sku') or '').strip()
+            if not sku:
+                self.skip(line_number, 'sku is required')
+                continue
+            food = FoodItem(
+                sku=sku,
+                name=str(row.get('name') or '').strip(),
+                description=str(row.get('description') or '').strip(),
+                price=row.get('price'),
+            )
+            try:
+                # Converts price to a Decimal and checks lengths and digits
+                food.clean_fields(exclude=['description', 'image', 'image_variants'])
+            except ValidationError as e:
+                errors = '; '.join(f'{field}: {" ".join(messages)}' for field, messages in e.message_dict.items())
+                self.skip(line_number, errors)
+                continue
+            food.line_number = line_number
+            food.given_fields = [field for field in OPTIONAL_FIELDS if field in row]
+            food.image_file = str(row.get('image') or '').strip()
+            food.has_new_image = False
+            foods.pop(sku, None)  # Keep the order of the last occurrence
+            foods[sku] = food
+        return list(foods.values())
+
+    def attach_image(self, food):
+        """
+        Copy the row's image into media storage and make its variants.
+        Runs in a worker thread. Returns True if food got a new image.
+        """
+        if self.images_dir is None:
+            self.stderr.write(f'  line {food.line_number}: image given but no --images directory - image ignored')
+            return False
+        try:
+            content = (self.images_dir / food.image_file).read_bytes()
+        except OSError as e:
+            self.stderr.write(f'  line {food.line_number}: cannot read image ({e}) - image ignored')
+            return False
+
+        # Named after the content, so importing the same file again reuses the stored copy
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        name = f'{IMPORT_DIR}/{digest}-{default_storage.get_valid_name(Path(food.image_file).name)}'
+        if not default_storage.exists(name):
+            name = default_storage.save(name, ContentFile(content))
+        food.image = name
+        try:
+            food.image_variants = images.generate_variants(food)
+        except Exception:
+            # Not fatal: generate_image_variants can make them later
+            logger.exception('Could not create image variants for %s', name)
+            food.image_variants = {}
+        return True
+
+    def upsert(self, foods):
+        """Insert new skus and update known ones, one batch in one transaction"""
+        if not foods:
+            return
+        with transaction.atomic():
+            known = set(FoodItem.objects.filter(sku__in=[food.sku for food in foods])
+                        .values_list('sku', flat=True))
+            # One upsert per set of columns to write, e.g. a price-only file
+            # must not blank the descriptions of the items it updates
+            groups = {}
+            for food in foods:
+                fields = UPDATE_FIELDS + food.given_fields + (IMAGE_FIELDS if food.has_new_image else [])
+                groups.setdefault(tuple(fields), []).append(food)
+            for fields, group in groups.items():
+                FoodItem.objects.bulk_create(
+                    group, update_conflicts=True, unique_fields=['sku'], update_fields=list(fields)
+                )
+        self.counts['updated'] += len(known)
+        self.counts['created'] += len(foods) - len(known)
+        self.counts['images'] += sum(food.has_new_image for food in foods)
@@ -0,0 +1,19 @@
+"""
+Management command to rebuild the menu search index from scratch.
+Needed after bulk imports, which skip the signals that keep it up to date.
+Run: python manage.py rebuild_search_index
+"""
+from django.core.management.base import BaseCommand
+
+from api.models import FoodItem
+from api.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index for all food items'
+
+    def handle(self, *args, **options):
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS(
+            f'Search index rebuilt for {FoodItem.objects.count()} food items'
+        ))
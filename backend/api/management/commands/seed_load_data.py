@@ -0,0 +1,196 @@
+"""
+Management command to fill the database with production-sized data for load tests.
+
+Run:
+    python manage.py seed_load_data                      # 100k foods, 1M users, 10M orders
+    python manage.py seed_load_data --foods 10000 --users 50000 --orders 200000
+
+Data is added to what is already there (run it on an empty database).
+Seeded users are called load<id> and all have the password "loadtest-pass".
+Orders are spread over the last two years, mostly delivered, with 1-5 lines
+each; a few popular dishes and a few heavy customers get most of the orders,
+like on a real menu. Rows are written with batched multi-row INSERTs (no
+model instances, no signals), which is several times faster than
+bulk_create for tens of millions of rows; the search index, menu cache and
+table statistics are refreshed at the end.
+
+See benchmarks/customer_journey.py for the workload to run against it.
+"""
+import functools
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connection, connections, models, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from api import search
+from api.caching import menu_cache
+from api.models import FoodItem, Order, OrderItem
+
+PASSWORD = 'loadtest-pass'
+
+CUISINES = ['Margherita', 'Pepperoni', 'Chicken', 'Paneer', 'Beef', 'Veggie', 'Spicy Tuna',
+            'Mushroom', 'BBQ', 'Falafel', 'Lamb', 'Tofu', 'Prawn', 'Teriyaki', 'Pesto']
+DISHES = ['Pizza', 'Burger', 'Wrap', 'Salad', 'Curry', 'Ramen', 'Tacos', 'Bowl', 'Pasta',
+          'Sandwich', 'Noodles', 'Burrito', 'Biryani', 'Sushi Roll', 'Skewers']
+SIDES = ['with fries', 'with garlic bread', 'with rice', 'with a side salad',
+         'with coleslaw', 'with dipping sauce', 'with pickles', 'with naan']
+
+
+class Command(BaseCommand):
+    help = 'Bulk-generates foods, users and historical orders for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--foods', type=int, default=100_000, help='menu items to create')
+        parser.add_argument('--users', type=int, default=1_000_000, help='customers to create')
+        parser.add_argument('--orders', type=int, default=10_000_000, help='historical orders to create')
+        parser.add_argument('--batch-size', type=int, default=10_000, help='rows per INSERT batch')
+        parser.add_argument('--seed', type=int, default=1, help='random seed (same seed, same data)')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        started = time.perf_counter()
+
+        foods = self.create_foods(options['foods'])
+        user_ids = self.create_users(options['users'])
+        self.create_orders(options['orders'], foods, user_ids)
+
+        # Rows were inserted with explicit ids - move the id sequences past them (PostgreSQL)
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [FoodItem, User, Order, OrderItem]):
+                cursor.execute(sql)
+            cursor.execute('ANALYZE')  # Fresh statistics for the query planner
+
+        search.rebuild_index()
+        menu_cache.bump()
+        self.stdout.write(self.style.SUCCESS(f'Done in {time.perf_counter() - started:.0f}s'))
+
+    def create_foods(self, count):
+        """Menu items; returns {food id: (price, name)}"""
+        start_id = self.next_id(FoodItem)
+        foods = {}
+
+        def rows():
+            for food_id in range(start_id, start_id + count):
+                price = Decimal(self.rng.randint(399, 2999)) / 100
+                name = f'{self.rng.choice(CUISINES)} {self.rng.choice(DISHES)} #{food_id}'
+                foods[food_id] = (price, name)
+                description = f'{name} {self.rng.choice(SIDES)}. Freshly made to order.'
+                yield (food_id, name, description, price, None, {}, self.now)
+
+        self.insert(FoodItem, ['id', 'name', 'description', 'price', 'image', 'image_variants', 'created_at'],
+                    rows(), count)
+        return foods
+
+    def create_users(self, count):
+        """Customers that can log in with PASSWORD; returns their ids"""
+        start_id = self.next_id(User)
+        password = make_password(PASSWORD)  # Hashing is slow - hash once, share it
+
+        def rows():
+            for user_id in range(start_id, start_id + count):
+                joined = self.now - timedelta(days=self.rng.uniform(0, 730))
+                yield (user_id, password, f'load{user_id}', f'load{user_id}@example.com',
+                       '', '', False, False, True, joined)
+
+        self.insert(User, ['id', 'password', 'username', 'email', 'first_name', 'last_name',
+                           'is_superuser', 'is_staff', 'is_active', 'date_joined'], rows(), count)
+        return range(start_id, start_id + count)
+
+    def create_orders(self, count, foods, user_ids):
+        """Historical orders and their lines, written in matching batches"""
+        if not count or not foods or not user_ids:
+            return
+        food_ids = sorted(foods)
+        order_id = self.next_id(Order)
+        item_id = self.next_id(OrderItem)
+        order_columns = ['id', 'user', 'total_price', 'status', 'created_at']
+        item_columns = ['id', 'order', 'food', 'food_name', 'food_image', 'quantity', 'price']
+
+        done = 0
+        started = time.perf_counter()
+        while done < count:
+            orders, items = [], []
+            for _ in range(min(self.batch_size, count - done)):
+                # Skewed choices: a few heavy customers and popular dishes get most orders
+                user_id = user_ids[int(len(user_ids) * self.rng.random() ** 2)]
+                total = 0
+                for _ in range(self.rng.randint(1, 5)):
+                    food_id = food_ids[int(len(food_ids) * self.rng.random() ** 3)]
+                    quantity = self.rng.choice((1, 1, 1, 2, 2, 3))
+                    price, name = foods[food_id]
+                    total += price * quantity
+                    items.append((item_id, order_id, food_id, name, '', quantity, price))
+                    item_id += 1
+                created_at = self.now - timedelta(seconds=self.rng.uniform(0, 730 * 86400))
+                status = Order.STATUS_DELIVERED if created_at < self.now - timedelta(hours=2) else Order.STATUS_PLACED
+                orders.append((order_id, user_id, total, status, created_at))
+                order_id += 1
+
+            with transaction.atomic():
+                self.insert(Order, order_columns, orders, len(orders), progress=False)
+                self.insert(OrderItem, item_columns, items, len(items), progress=False)
+            done += len(orders)
+            rate = done / (time.perf_counter() - started)
+            self.stdout.write(f'  orders: {done:,}/{count:,} ({rate:,.0f}/s)', ending='\r')
+        self.stdout.write('')
+
+    def next_id(self, model):
+        return (model.objects.aggregate(Max('id'))['id__max'] or 0) + 1
+
+    def insert(self, model, field_names, rows, count, progress=True):
+        """INSERT rows (tuples in field_names order) in batches of --batch-size"""
+        db = connections[DEFAULT_DB_ALIAS]  # The real connection, not the thread-local proxy
+        fields = [model._meta.get_field(name) for name in field_names]
+        columns = ', '.join(db.ops.quote_name(field.column) for field in fields)
+        table = db.ops.quote_name(model._meta.db_table)
+        placeholders = '(' + ', '.join(['%s'] * len(fields)) + ')'
+
+        # SQLite allows at most 999 (older builds) variables per statement
+        rows_per_statement = max(1, 999 // len(fields))
+        batch = []
+        written = 0
+
+        def flush():
+            nonlocal written
+            with db.cursor() as cursor:
+                for start in range(0, len(batch), rows_per_statement):
+                    chunk = batch[start:start + rows_per_statement]
+                    cursor.execute(
+                        f'INSERT INTO {table} ({columns}) VALUES ' + ', '.join([placeholders] * len(chunk)),
+                        [value for row in chunk for value in row],
+                    )
+            written += len(batch)
+            batch.clear()
+            if progress:
+                self.stdout.write(f'  {model._meta.verbose_name_plural}: {written:,}/{count:,}', ending='\r')
+
+        # Same conversion the ORM does (dates, decimals, JSON) for this database;
+        # ints, strings and None go to the driver as they are
+        converters = [
+            None if isinstance(field, (models.IntegerField, models.CharField, models.BooleanField, models.ForeignKey))
+            else functools.partial(field.get_db_prep_save, connection=db)
+            for field in fields
+        ]
+        for row in rows:
+            batch.append([
+                value if convert is None or value is None else convert(value)
+                for convert, value in zip(converters, row)
+            ])
+            if len(batch) >= self.batch_size:
+                with transaction.atomic():
+                    flush()
+        if batch:
+            with transaction.atomic():
+                flush()
+        if progress:
+            self.stdout.write('')
@@ -0,0 +1,379 @@
+"""
+Prometheus metrics, collected across all gunicorn / uvicorn worker processes.
+
+Each process counts in memory (a dict update under a lock per request) and a
+background thread writes its numbers to <server dir>/<pid>.json every
+METRICS_FLUSH_SECONDS. GET /api/metrics/ adds up the files of all processes,
+so it doesn't matter which worker answers the scrape.
+
+The server dir is METRICS_DIR/<parent pid>-<its start time>: workers of one
+gunicorn master / uvicorn supervisor share it. Directories of servers that
+are gone are deleted when a worker starts, and so are the files of earlier
+runs when it is the only running process of its server, so a restarted or
+redeployed server starts from zero. When a worker exits while others keep
+running, its counters and histograms are added to archived.json (its gauges
+are dropped), so the totals never go down, even when a pid is reused.
+
+What is collected:
+  http_requests_total{view,method,status}     requests (api/middleware.py)
+  http_request_duration_seconds{view}         latency histogram
+  http_requests_in_flight                     requests being handled right now
+  db_queries_total{view}                      database queries per view
+  db_connections_opened_total                 new database connections; with
+                                              persistent connections this stays
+                                              low (Django 4.2 has no pool)
+  cache_lookups_total{cache,result}           hits/misses of the menu, search,
+                                              order and token caches
+  cache_hit_ratio{cache}                      the same as a ratio, all workers
+
+Only staff users, or scrapers sending "Authorization: Bearer <METRICS_TOKEN>",
+may read them (see views.metrics_view).
+"""
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: exited workers' files are summed, not archived
+    fcntl = None
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds (upper bounds); +Inf is added when rendering
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name -> (type, help)
+METRICS = {
+    'http_requests_total': ('counter', 'Requests handled, by view, method and status.'),
+    'http_request_duration_seconds': ('histogram', 'Time to produce the response, by view.'),
+    'http_requests_in_flight': ('gauge', 'Requests being handled right now.'),
+    'db_queries_total': ('counter', 'Database queries run, by view.'),
+    'db_connections_opened_total': ('counter', 'New database connections opened.'),
+    'cache_lookups_total': ('counter', 'Cache lookups, by cache and hit/miss.'),
+    'cache_hit_ratio': ('gauge', 'Share of cache lookups that were hits.'),
+}
+
+
+class MetricsRegistry:
+    """
+    One process's metrics. Labels are tuples of (name, value) pairs.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._reset()
+
+    def _reset(self):
+        self.counters = {}    # (name, labels) -> value
+        self.gauges = {}      # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> [count per bucket..., sum, count]
+
+    def _check_pid(self):
+        """
+        Start fresh in a new process: a gunicorn worker forked from a master
+        that already counted something must not report those numbers again.
+        Called with the lock held.
+        """
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            self._reset()
+            try:
+                _start_server_dir(pid)
+            except OSError:
+                logger.exception('Could not prepare metrics directory %s', metrics_dir())
+            flusher = threading.Thread(target=self._flush_forever, name='metrics-flush', daemon=True)
+            flusher.start()
+
+    def inc(self, name, labels=(), amount=1):
+        with self._lock:
+            self._check_pid()
+            key = (name, labels)
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def add_gauge(self, name, labels=(), amount=1):
+        with self._lock:
+            self._check_pid()
+            key = (name, labels)
+            self.gauges[key] = self.gauges.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        """Add one sample to a histogram"""
+        with self._lock:
+            self._check_pid()
+            key = (name, labels)
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [0] * (len(BUCKETS) + 2)
+            for index, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    histogram[index] += 1
+                    break
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def snapshot(self):
+        """This process's metrics as JSON-serializable data"""
+        with self._lock:
+            self._check_pid()
+            data = {
+                'pid': self._pid,
+                'counters': [[name, labels, value] for (name, labels), value in self.counters.items()],
+                'gauges': [[name, labels, value] for (name, labels), value in self.gauges.items()],
+                'histograms': [[name, labels, values] for (name, labels), values in self.histograms.items()],
+            }
+        data['counters'].extend(_cache_counters())
+        return data
+
+    def flush(self):
+        """Write this process's file"""
+        data = self.snapshot()
+        os.makedirs(metrics_dir(), exist_ok=True)
+        _write(_process_file(data['pid']), data)
+
+    def _flush_forever(self):
+        pid = os.getpid()
+        while self._pid == pid:
+            time.sleep(settings.METRICS_FLUSH_SECONDS)
+            try:
+                self.flush()
+            except OSError:
+                logger.exception('Could not write metrics to %s', metrics_dir())
+
+
+registry = MetricsRegistry()
+
+
+def _base_dir():
+    return settings.METRICS_DIR or os.path.join(tempfile.gettempdir(), 'quickbite-metrics')
+
+
+def _start_time(pid):
+    """When a process started (clock ticks since boot), or '' if unknown"""
+    try:
+        with open(f'/proc/{pid}/stat') as file:
+            # The command name (field 2) may contain spaces; it ends with ')'
+            return file.read().rsplit(')', 1)[1].split()[19]
+    except (OSError, IndexError):
+        return ''
+
+
+def _server_id(pid):
+    """Directory name for the server (gunicorn master etc.) process `pid`"""
+    return f'{pid}-{_start_time(pid)}'.rstrip('-')
+
+
+def metrics_dir():
+    """This server's directory: shared by its workers, new for every restart"""
+    return os.path.join(_base_dir(), _server_id(os.getppid()))
+
+
+def _start_server_dir(pid):
+    """
+    Called when a process starts counting. Deletes the directories of servers
+    that have stopped. If no other process of this server is running, this
+    is a new start of the server: the files of earlier runs are deleted.
+    Otherwise an old file of a dead process that had our pid is archived
+    (writing ours over it would make its counters go down).
+    """
+    base = _base_dir()
+    directory = metrics_dir()
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(base):
+        server_pid = name.split('-', 1)[0]
+        path = os.path.join(base, name)
+        if path == directory or not server_pid.isdigit() or not os.path.isdir(path):
+            continue
+        if not _process_alive(int(server_pid)) or _server_id(int(server_pid)) != name:
+            shutil.rmtree(path, ignore_errors=True)
+
+    with _archive_lock():
+        others = [int(name[:-len('.json')]) for name in os.listdir(directory)
+                  if name.endswith('.json') and name[:-len('.json')].isdigit()]
+        others = [other for other in others if other != pid]
+        if not any(_process_alive(other) for other in others):
+            for name in os.listdir(directory):
+                if name.endswith('.json'):
+                    os.remove(os.path.join(directory, name))
+        elif os.path.exists(_process_file(pid)):
+            _archive(pid)
+        # Written straight away so processes starting after us see us running
+        _write(_process_file(pid), {'pid': pid, 'counters': [], 'gauges': [], 'histograms': []})
+
+
+def _process_file(pid):
+    return os.path.join(metrics_dir(), f'{pid}.json')
+
+
+def _read(path):
+    """A metrics file's data, or None if it is missing or being replaced"""
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write(path, data):
+    """Write a metrics file atomically, so readers never see half of it"""
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'w') as file:
+        json.dump(data, file)
+    os.replace(temporary, path)
+
+
+@contextmanager
+def _archive_lock():
+    """Only one process at a time moves files into archived.json"""
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(metrics_dir(), 'archive.lock'), 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _archive(pid):
+    """
+    Add a dead process's counters and histograms to archived.json and delete
+    its file. Call with _archive_lock() held.
+    """
+    path = _process_file(pid)
+    data = _read(path)
+    if data is None:
+        return
+    archive_path = os.path.join(metrics_dir(), 'archived.json')
+    archived = _read(archive_path) or {'pid': None, 'counters': [], 'gauges': [], 'histograms': []}
+    counters, _, histograms = _add_up([archived, data], with_gauges=False)
+    _write(archive_path, {
+        'pid': None,
+        'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+        'gauges': [],
+        'histograms': [[name, labels, values] for (name, labels), values in histograms.items()],
+    })
+    os.remove(path)
+
+
+def _cache_counters():
+    """Hit/miss counts of the in-process caches, as counter rows"""
+    from .authentication import token_cache
+    from .caching import menu_cache, order_cache, search_cache
+
+    rows = []
+    for name, cache in (('menu', menu_cache), ('search', search_cache),
+                        ('orders', order_cache), ('token', token_cache)):
+        rows.append(['cache_lookups_total', [['cache', name], ['result', 'hit']], cache.hits])
+        rows.append(['cache_lookups_total', [['cache', name], ['result', 'miss']], cache.misses])
+    return rows
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        pass  # Exists but isn't ours, or no way to tell (Windows) - keep it
+    return True
+
+
+def _add_up(files, with_gauges=True):
+    """Sum the (counters, gauges, histograms) of metrics file contents"""
+    counters, gauges, histograms = {}, {}, {}
+    for data in files:
+        for name, labels, value in data['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        if with_gauges:
+            for name, labels, value in data['gauges']:
+                key = (name, tuple(map(tuple, labels)))
+                gauges[key] = gauges.get(key, 0) + value
+        for name, labels, values in data['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            total = histograms.setdefault(key, [0] * len(values))
+            for index, value in enumerate(values):
+                total[index] += value
+    return counters, gauges, histograms
+
+
+def collect():
+    """Add up the metrics of every process of this server (this one is written out first)"""
+    registry.flush()
+    directory = metrics_dir()
+    files = []
+    # Under the lock, so no file is archived between being read and archived.json being read
+    with _archive_lock():
+        for name in os.listdir(directory):
+            pid = name[:-len('.json')]
+            if not name.endswith('.json') or not pid.isdigit():
+                continue
+            alive = _process_alive(int(pid))
+            if not alive and fcntl is not None:
+                _archive(int(pid))
+                continue
+            data = _read(os.path.join(directory, name))
+            if data is not None:
+                if not alive:
+                    data['gauges'] = []
+                files.append(data)
+        archived = _read(os.path.join(directory, 'archived.json'))
+    if archived is not None:
+        files.append(archived)
+    counters, gauges, histograms = _add_up(files)
+
+    # Hit ratios from the summed counters, so they cover all workers
+    for (name, labels), hits in list(counters.items()):
+        if name == 'cache_lookups_total' and ('result', 'hit') in labels:
+            cache = labels[0]
+            misses = counters.get((name, (cache, ('result', 'miss'))), 0)
+            if hits + misses:
+                gauges[('cache_hit_ratio', (cache,))] = hits / (hits + misses)
+    return counters, gauges, histograms
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def render_metrics():
+    """All metrics in the Prometheus text format (version 0.0.4)"""
+    counters, gauges, histograms = collect()
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'histogram':
+            for (metric, labels), values in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(BUCKETS, values):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_format_labels(labels + (("le", repr(bound)),))} {cumulative}')
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {values[-1]}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {values[-2]}')
+                lines.append(f'{name}_count{_format_labels(labels)} {values[-1]}')
+        else:
+            samples = counters if kind == 'counter' else gauges
+            for (metric, labels), value in sorted(samples.items()):
+                if metric == name:
+                    lines.append(f'{name}{_format_labels(labels)} {value}')
+    return '\n'.join(lines) + '\n'
@@ -1,43 +1,171 @@
 """
-Custom middleware for better error handling and logging
+Custom middleware for better error handling, logging and request timing
 """
-import traceback
 import logging
+import time
+import traceback
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
 from django.http import JsonResponse
-from rest_framework.response import Response
-from rest_framework import status
+from django.utils.deprecation import MiddlewareMixin
+
+from . import metrics
+from .timing import RequestTimer, current_timer
 
 logger = logging.getLogger(__name__)
+request_logger = logging.getLogger('api.requests')
+
+
+class ErrorHandlingMiddleware(MiddlewareMixin):
+    """
+    Middleware to catch and handle exceptions globally.
+    Crashes in /api/ views return JSON instead of Django's HTML error page
+    (the admin keeps the normal one).
+    """
+
+    def process_exception(self, request, exception):
+        if not request.path.startswith('/api/'):
+            return None
+
+        # Log the full error
+        logger.error(f"Unhandled exception: {str(exception)}")
+        logger.error(traceback.format_exc())
+
+        # Return JSON error response
+        return JsonResponse({
+            'error': 'Internal server error',
+            'detail': str(exception),
+            'path': request.path,
+        }, status=500)
+
+
+def _record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper (see connection.execute_wrapper): counts and
+    times every query made while a request is being timed.
+    """
+    timer = current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = (time.perf_counter() - started) * 1000
+        timer.add_query(duration)
+        if duration >= settings.SLOW_QUERY_MS:
+            # Parameters are left out on purpose: they can hold tokens or passwords
+            logger.warning('slow query %.1f ms during %s: %s', duration, timer.label, sql)
+
+
+def _install_query_recorder(connection, **kwargs):
+    """Add _record_query to a database connection (once)"""
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
 
 
-class ErrorHandlingMiddleware:
+def _count_connection(connection, **kwargs):
+    metrics.registry.inc('db_connections_opened_total', (('database', connection.alias),))
+
+
+class RequestTimingMiddleware:
     """
-    Middleware to catch and handle exceptions globally
+    Measures every request that reaches Django (not static/media files):
+    wall time, number and time of database queries, and the phases code marks
+    with timing.record_phase() ('serialize' for the serializers, 'render'
+    for JSON encoding).
+
+    The numbers go into the Server-Timing header (visible in the browser's
+    network tab) and into one log line per request on the 'api.requests'
+    logger, e.g.
+        GET /api/cart/ view=cart status=200 total_ms=4.12 db_queries=2 db_ms=0.91 serialize_ms=0.40 render_ms=0.10
+    The same values are passed as `extra={'timing': {...}}` for JSON log handlers.
+    Queries slower than SLOW_QUERY_MS are logged with their SQL.
+    Request counts and latencies also go to api/metrics.py (GET /api/metrics/).
     """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+        # Every connection (one per thread) gets the query recorder
+        connection_created.connect(_install_query_recorder)
+        connection_created.connect(_count_connection)
+        for connection in connections.all(initialized_only=True):
+            _install_query_recorder(connection)
 
     def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timer = RequestTimer(label=f'{request.method} {request.path}')
+        token = current_timer.set(timer)
+        metrics.registry.add_gauge('http_requests_in_flight')
+        started = time.perf_counter()
         try:
             response = self.get_response(request)
-            return response
-        except Exception as e:
-            # Log the full error
-            logger.error(f"Unhandled exception: {str(e)}")
-            logger.error(traceback.format_exc())
-            
-            # Return JSON error response
-            return JsonResponse({
-                'error': 'Internal server error',
-                'detail': str(e),
-                'path': request.path,
-            }, status=500)
-
-
-
-
+        finally:
+            current_timer.reset(token)
+            metrics.registry.add_gauge('http_requests_in_flight', amount=-1)
+        self.finish(request, response, timer, started)
+        return response
 
+    async def __acall__(self, request):
+        timer = RequestTimer(label=f'{request.method} {request.path}')
+        token = current_timer.set(timer)
+        metrics.registry.add_gauge('http_requests_in_flight')
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timer.reset(token)
+            metrics.registry.add_gauge('http_requests_in_flight', amount=-1)
+        self.finish(request, response, timer, started)
+        return response
 
+    def finish(self, request, response, timer, started):
+        """Add the Server-Timing header, log the request and count it in the metrics"""
+        total = (time.perf_counter() - started) * 1000
+        server_timing = [
+            f'total;dur={total:.2f}',
+            f'db;dur={timer.db_ms:.2f};desc="{timer.queries} queries"',
+            timer.server_timing(),
+        ]
+        if response.has_header('Server-Timing'):  # e.g. the checkout phases
+            server_timing.append(response['Server-Timing'])
+        response['Server-Timing'] = ', '.join(metric for metric in server_timing if metric)
 
+        match = request.resolver_match
+        timing = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.url_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total, 2),
+            'db_queries': timer.queries,
+            'db_ms': round(timer.db_ms, 2),
+        }
+        timing.update({f'{name}_ms': round(duration, 2) for name, duration in timer.timings.items()})
 
+        # Unmatched URLs (404s) share one label, so random paths can't add series
+        view = (('view', timing['view'] or 'unmatched'),)
+        metrics.registry.inc('http_requests_total', view + (
+            ('method', request.method), ('status', str(response.status_code))
+        ))
+        metrics.registry.observe('http_request_duration_seconds', view, total / 1000)
+        if timer.queries:
+            metrics.registry.inc('db_queries_total', view, timer.queries)
 
+        request_logger.info(
+            '%s %s view=%s status=%s %s',
+            request.method, request.path, timing['view'], response.status_code,
+            ' '.join(f'{key}={value}' for key, value in list(timing.items())[4:]),
+            extra={'timing': timing},
+        )
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:35
+
+from django.db import migrations, models
+
+
+def mark_existing_orders_delivered(apps, schema_editor):
+    """Orders placed before tracking existed are long done - don't show them as "placed" """
+    Order = apps.get_model('api', 'Order')
+    Order.objects.update(status='delivered')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_fooditem_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='status',
+            field=models.CharField(choices=[('placed', 'Placed'), ('preparing', 'Preparing'), ('out_for_delivery', 'Out for delivery'), ('delivered', 'Delivered')], default='placed', max_length=20),
+        ),
+        migrations.RunPython(mark_existing_orders_delivered, migrations.RunPython.noop),
+    ]
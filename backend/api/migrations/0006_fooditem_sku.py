@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_order_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fooditem',
+            name='sku',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_fooditem_sku'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='food_image',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='food_name',
+            field=models.CharField(default='', max_length=200),
+        ),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='food',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.fooditem'),
+        ),
+    ]
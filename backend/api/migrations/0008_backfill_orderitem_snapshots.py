@@ -0,0 +1,37 @@
+from django.db import migrations
+from django.db.models import Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+# Order lines updated per statement (and per transaction)
+BATCH_SIZE = 10000
+
+
+def copy_food_name_and_image(apps, schema_editor):
+    """
+    Fill OrderItem.food_name/food_image from the food each line points to.
+    One UPDATE per id range, each committed on its own, so a big order
+    table is never locked as a whole (or rewritten in one huge transaction).
+    """
+    FoodItem = apps.get_model('api', 'FoodItem')
+    OrderItem = apps.get_model('api', 'OrderItem')
+    food = FoodItem.objects.filter(id=OuterRef('food_id'))
+
+    last_id = OrderItem.objects.aggregate(Max('id'))['id__max'] or 0
+    for start in range(0, last_id + 1, BATCH_SIZE):
+        OrderItem.objects.filter(id__gte=start, id__lt=start + BATCH_SIZE, food__isnull=False).update(
+            food_name=Coalesce(Subquery(food.values('name')[:1]), Value('')),
+            food_image=Coalesce(Subquery(food.values('image')[:1]), Value('')),
+        )
+
+
+class Migration(migrations.Migration):
+    # Every batch commits by itself (see copy_food_name_and_image)
+    atomic = False
+
+    dependencies = [
+        ('api', '0007_orderitem_snapshots'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_food_name_and_image, migrations.RunPython.noop),
+    ]
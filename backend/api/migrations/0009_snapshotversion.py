@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_backfill_orderitem_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SnapshotVersion',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField()),
+            ],
+        ),
+    ]
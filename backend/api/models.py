@@ -12,9 +12,11 @@ class FoodItem(models.Model):
     This is like a menu item with name, price, description, and image.
     """
     name = models.CharField(max_length=200)  # Food name (e.g., "Margherita Pizza")
+    sku = models.CharField(max_length=64, unique=True, blank=True, null=True)  # Restaurant's own item code; import_menu updates items by it
     description = models.TextField()  # Description of the food
     price = models.DecimalField(max_digits=10, decimal_places=2)  # Price (e.g., 12.99)
     image = models.ImageField(upload_to='food_images/', blank=True, null=True)  # Image stored in media/food_images/ (optional)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)  # Resized/WebP copies (see api/images.py)
     created_at = models.DateTimeField(auto_now_add=True)  # When item was added
     
     def __str__(self):
@@ -23,6 +25,12 @@ class FoodItem(models.Model):
     
     class Meta:
         ordering = ['-created_at']  # Newest items first
+        indexes = [
+            # Menu listing and cursor pagination walk (created_at, id) newest first
+            models.Index(fields=['-created_at', '-id'], name='fooditem_created_idx'),
+            # Exact name lookups (create_sample_foods, menu imports)
+            models.Index(fields=['name'], name='fooditem_name_idx'),
+        ]
 
 
 class CartItem(models.Model):
@@ -40,7 +48,9 @@ class CartItem(models.Model):
         return f"{self.user.username} - {self.food.name} x{self.quantity}"
     
     class Meta:
-        unique_together = ['user', 'food']  # One cart item per user-food combination
+        # One cart item per user-food combination.
+        # Its index starts with user, so it also serves "all cart items of a user".
+        unique_together = ['user', 'food']
 
 
 class Order(models.Model):
@@ -48,8 +58,21 @@ class Order(models.Model):
     Order model - stores information about a completed order.
     When user places an order, we create one Order with multiple OrderItems.
     """
+    # Order lifecycle, in order (see api/tracking.py for how an order moves along)
+    STATUS_PLACED = 'placed'
+    STATUS_PREPARING = 'preparing'
+    STATUS_OUT_FOR_DELIVERY = 'out_for_delivery'
+    STATUS_DELIVERED = 'delivered'
+    STATUS_CHOICES = [
+        (STATUS_PLACED, 'Placed'),
+        (STATUS_PREPARING, 'Preparing'),
+        (STATUS_OUT_FOR_DELIVERY, 'Out for delivery'),
+        (STATUS_DELIVERED, 'Delivered'),
+    ]
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)  # Which user placed the order
     total_price = models.DecimalField(max_digits=10, decimal_places=2)  # Total order amount
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PLACED)  # Where the order is now
     created_at = models.DateTimeField(auto_now_add=True)  # When order was placed
     
     def __str__(self):
@@ -58,6 +81,12 @@ class Order(models.Model):
     
     class Meta:
         ordering = ['-created_at']  # Newest orders first
+        indexes = [
+            # A user's orders, newest first (order history)
+            models.Index(fields=['user', '-created_at', '-id'], name='order_user_created_idx'),
+            # All orders by date (admin, exports)
+            models.Index(fields=['-created_at', '-id'], name='order_created_idx'),
+        ]
 
 
 class OrderItem(models.Model):
@@ -66,11 +95,26 @@ class OrderItem(models.Model):
     One Order can have multiple OrderItems (one for each food item ordered).
     """
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')  # Which order
-    food = models.ForeignKey(FoodItem, on_delete=models.CASCADE)  # Which food item
+    # Which food item; None once it is deleted from the menu (the line itself stays)
+    food = models.ForeignKey(FoodItem, on_delete=models.SET_NULL, null=True, blank=True)
+    food_name = models.CharField(max_length=200, default='')  # Name at time of order
+    food_image = models.CharField(max_length=100, blank=True, default='')  # Image file at time of order ('' = none)
     quantity = models.PositiveIntegerField()  # How many ordered
     price = models.DecimalField(max_digits=10, decimal_places=2)  # Price at time of order
     
     def __str__(self):
         """String representation"""
-        return f"{self.order.id} - {self.food.name} x{self.quantity}"
+        return f"{self.order_id} - {self.food_name} x{self.quantity}"
+
+
 
+class SnapshotVersion(models.Model):
+    """
+    Version number of a group of cached API responses (see api/caching.py).
+    Lives in the database so every worker process sees the same versions.
+    """
+    name = models.CharField(max_length=100, primary_key=True)  # e.g. "menu:version" or "orders:version:42"
+    version = models.BigIntegerField()  # Changes whenever the data behind the responses does
+
+    def __str__(self):
+        return f"{self.name} = {self.version}"
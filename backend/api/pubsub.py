@@ -0,0 +1,135 @@
+"""
+Publish/subscribe for live updates (order status changes, see api/tracking.py).
+
+Publishers are ordinary sync code (views, the admin); subscribers are async
+views holding a stream open under ASGI. A broker connects the two:
+
+    broker.publish(channel, message)          # from anywhere, returns at once
+    async with broker.subscribe(channel) as queue:
+        message = await queue.get()           # an asyncio.Queue of messages
+
+Messages are JSON-serializable dicts. Delivery is best effort: a subscriber
+only sees messages published while it is subscribed, so it should read the
+current state after subscribing (see async_views.order_events).
+
+The broker class is set with ORDER_EVENTS_BROKER:
+- LocalBroker (default without REDIS_URL) only reaches subscribers in the
+  same process. Fine for `runserver`, tests and a single uvicorn worker.
+- RedisBroker (default with REDIS_URL, needs `pip install redis`) reaches
+  every worker and server process, including the WSGI ones that make the
+  changes.
+"""
+import asyncio
+import json
+import logging
+import threading
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+try:
+    import redis
+    import redis.asyncio
+except ImportError:  # Optional dependency - only needed for RedisBroker
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class LocalBroker:
+    """In-process broker: subscribers are asyncio queues, one per open stream"""
+
+    def __init__(self):
+        self._subscribers = {}  # channel -> set of (event loop, queue)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            # Queues belong to their event loop; hand the message over thread-safely
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, message)
+            except RuntimeError:  # That loop has shut down
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(channel, set())
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    self._subscribers.pop(channel, None)
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+
+class RedisBroker(LocalBroker):
+    """
+    Redis PUBLISH/SUBSCRIBE, so every process connected to REDIS_URL gets the
+    messages. Each process holds one Redis subscription for all channels and
+    hands messages to its own streams like LocalBroker does, so a thousand
+    open streams still cost one Redis connection.
+    """
+    prefix = 'quickbite:'
+
+    def __init__(self, url=None):
+        if redis is None:
+            raise ImportError('RedisBroker needs the redis package: pip install redis')
+        super().__init__()
+        self.url = url or settings.REDIS_URL
+        self._client = redis.Redis.from_url(self.url)
+        self._listener = None
+
+    def publish(self, channel, message):
+        try:
+            self._client.publish(self.prefix + channel, json.dumps(message))
+        except redis.RedisError:
+            # The change itself is saved; clients see it when they reconnect
+            logger.exception('Could not publish to %s', channel)
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        async with super().subscribe(channel) as queue:
+            yield queue
+
+    async def _listen(self):
+        """Forward every message under our prefix to this process's subscribers"""
+        while True:
+            client = redis.asyncio.Redis.from_url(self.url)
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                await pubsub.psubscribe(self.prefix + '*')
+                async for item in pubsub.listen():
+                    channel = item['channel'].decode()[len(self.prefix):]
+                    super().publish(channel, json.loads(item['data']))
+            except redis.RedisError:
+                logger.exception('Redis subscription lost, reconnecting')
+                await asyncio.sleep(1)
+            finally:
+                await client.close()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """The broker configured with ORDER_EVENTS_BROKER (one per process)"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.ORDER_EVENTS_BROKER)()
+    return _broker
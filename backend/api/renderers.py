@@ -0,0 +1,52 @@
+"""
+JSON renderer that uses orjson when it is installed.
+orjson is several times faster than the standard json module; the output is
+kept byte-for-byte the same as DRF's JSONRenderer, so ETags do not change.
+"""
+from rest_framework.renderers import JSONRenderer
+
+from .timing import record_phase
+
+try:
+    import orjson
+except ImportError:  # Optional dependency - fall back to DRF's renderer
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Drop-in replacement for rest_framework.renderers.JSONRenderer.
+
+    Uses DRF's own encoder for anything orjson doesn't handle the same way
+    (datetimes, Decimals, lazy strings) and falls back to DRF entirely for
+    pretty-printed output or data orjson refuses (e.g. non-string keys).
+    Floats print the same in both for the values this API returns; they only
+    differ in exponent notation (1e+16 vs 1e16) for huge or tiny numbers.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with record_phase('render'):
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type, renderer_context):
+        if orjson is None or data is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            body = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same as DRF: escape U+2028/U+2029 so the output is valid JavaScript
+        if b'\xe2\x80\xa8' in body or b'\xe2\x80\xa9' in body:
+            body = body.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return body
+
+
+def render_json(data):
+    """Render data the way API responses are rendered"""
+    return FastJSONRenderer().render(data)
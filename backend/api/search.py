@@ -0,0 +1,198 @@
+"""
+Full-text menu search.
+
+Three interchangeable backends, picked from the database in use:
+- SQLite:      an FTS5 table (api_fooditem_fts) kept in sync by model signals
+- PostgreSQL:  a GIN index on to_tsvector(name || description), maintained by
+               the database itself (see migration 0003)
+- Fallback:    an in-process inverted index, used when the SQLite build has no
+               FTS5; rebuilt whenever the menu version changes
+
+Every word in the query must match, the last characters of each word may be
+missing (prefix match: "marg piz" finds "Margherita Pizza"), and matches in
+the name rank above matches in the description.
+"""
+import bisect
+import re
+import threading
+
+from django.db import connection
+
+from .caching import menu_cache
+from .models import FoodItem
+
+FTS_TABLE = 'api_fooditem_fts'
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+# Same expression as the GIN index in migration 0003 - it must match exactly
+PG_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+)
+
+
+def tokenize(text):
+    """Lower-cased words of `text`"""
+    return WORD_RE.findall(text.lower())
+
+
+def search_food_ids(query, limit=20):
+    """Return ids of the best matching food items, best first"""
+    words = tokenize(query)
+    if not words:
+        return []
+    if connection.vendor == 'postgresql':
+        return _postgres_search(words, limit)
+    if connection.vendor == 'sqlite' and fts5_ready():
+        return _fts5_search(words, limit)
+    return memory_index.search(words, limit)
+
+
+# ---------------- SQLite FTS5 ----------------
+
+_fts5_ready = None
+
+
+def fts5_ready():
+    """True when the FTS5 table exists (created by migration 0003)"""
+    global _fts5_ready
+    if _fts5_ready is None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE]
+            )
+            _fts5_ready = cursor.fetchone() is not None
+    return _fts5_ready
+
+
+def _fts5_search(words, limit):
+    match = ' '.join(f'"{word}"*' for word in words)
+    with connection.cursor() as cursor:
+        # bm25: lower is better; a name match counts 10x a description match
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            f"ORDER BY bm25({FTS_TABLE}, 10.0, 1.0) LIMIT %s",
+            [match, limit]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def index_food(food):
+    """Add or refresh one food item in the index (called from signals)"""
+    if connection.vendor == 'sqlite' and fts5_ready():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [food.id])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, description) VALUES (%s, %s, %s)',
+                [food.id, food.name, food.description]
+            )
+
+
+def remove_food(food_id):
+    """Remove one food item from the index (called from signals)"""
+    if connection.vendor == 'sqlite' and fts5_ready():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [food_id])
+
+
+def rebuild_index():
+    """
+    Re-index the whole menu in one statement.
+    Use after bulk_create()/update(), which do not send signals.
+    """
+    if connection.vendor == 'sqlite' and fts5_ready():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+                'SELECT id, name, description FROM api_fooditem'
+            )
+    memory_index.invalidate()
+
+
+# ---------------- PostgreSQL ----------------
+
+def _postgres_search(words, limit):
+    tsquery = ' & '.join(f'{word}:*' for word in words)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT id FROM api_fooditem "
+            f"WHERE ({PG_DOCUMENT}) @@ to_tsquery('simple', %s) "
+            f"ORDER BY ts_rank(({PG_DOCUMENT}), to_tsquery('simple', %s)) DESC, id DESC "
+            f"LIMIT %s",
+            [tsquery, tsquery, limit]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+# ---------------- In-process fallback ----------------
+
+class MemoryIndex:
+    """
+    Inverted index held in process memory.
+    words:  sorted list of every indexed word (binary search for prefixes)
+    postings: word -> {food_id: weight}
+    """
+    NAME_WEIGHT = 10
+    DESCRIPTION_WEIGHT = 1
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        # (sorted words, postings) swapped in as one tuple so readers never
+        # see the words of one build with the postings of another
+        self._data = ([], {})
+
+    def invalidate(self):
+        self._version = None
+
+    def _ensure_built(self):
+        version = menu_cache.version()
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            postings = {}
+            rows = FoodItem.objects.values_list('id', 'name', 'description')
+            for food_id, name, description in rows.iterator(chunk_size=2000):
+                for text, weight in ((name, self.NAME_WEIGHT), (description, self.DESCRIPTION_WEIGHT)):
+                    for word in tokenize(text):
+                        scores = postings.setdefault(word, {})
+                        scores[food_id] = scores.get(food_id, 0) + weight
+            self._data = (sorted(postings), postings)
+            self._version = version
+
+    def _prefix_scores(self, words, postings, prefix):
+        """{food_id: score} for every word starting with `prefix`"""
+        scores = {}
+        position = bisect.bisect_left(words, prefix)
+        while position < len(words) and words[position].startswith(prefix):
+            for food_id, weight in postings[words[position]].items():
+                scores[food_id] = scores.get(food_id, 0) + weight
+            position += 1
+        return scores
+
+    def search(self, query_words, limit):
+        self._ensure_built()
+        words, postings = self._data
+        result = None
+        for word in query_words:
+            scores = self._prefix_scores(words, postings, word)
+            if result is None:
+                result = scores
+            else:
+                # Every word must match: keep ids present in both
+                result = {
+                    food_id: score + scores[food_id]
+                    for food_id, score in result.items() if food_id in scores
+                }
+            if not result:
+                return []
+        ranked = sorted(result.items(), key=lambda item: (-item[1], -item[0]))
+        return [food_id for food_id, _ in ranked[:limit]]
+
+
+memory_index = MemoryIndex()
+
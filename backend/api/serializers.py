@@ -2,11 +2,75 @@
 Serializers convert our database models to JSON format for the API.
 They also validate data when creating/updating items.
 """
+from functools import lru_cache
+
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
+from django.core.files.storage import default_storage
+from django.utils.encoding import filepath_to_uri
 from .models import FoodItem, CartItem, Order, OrderItem
 
+# Public address of MEDIA_ROOT (e.g. a CDN), worked out once at startup.
+# Empty means "same host as the API request".
+MEDIA_BASE_URL = settings.MEDIA_BASE_URL.rstrip('/') + '/' if settings.MEDIA_BASE_URL else ''
+
+
+def media_origin(request):
+    """
+    Scheme and host put in front of relative media URLs for this request.
+    '' when MEDIA_BASE_URL is set (URLs are then the same for every request).
+    Views add it to their cache keys.
+    """
+    if MEDIA_BASE_URL or request is None:
+        return ''
+    return f"{request.scheme}://{request.get_host()}"
+
+
+def media_url(name, context):
+    """
+    Absolute URL of a file in MEDIA_ROOT.
+    `context` is the serializer context; without MEDIA_BASE_URL it needs the
+    'request' key, and the request's origin is stored in it so it is worked
+    out once per response rather than once per item.
+    """
+    url = _storage_url(name)
+    if MEDIA_BASE_URL:
+        return url
+    origin = context.get('media_origin')
+    if origin is None:
+        origin = context['media_origin'] = media_origin(context.get('request'))
+    return origin + url if url.startswith('/') else url
+
+
+@lru_cache(maxsize=65536)
+def _storage_url(name):
+    """
+    URL of a stored file, remembered: storage.url() (urljoin + quoting) costs
+    more than the rest of serializing a menu item, and a name's URL never changes.
+    """
+    if MEDIA_BASE_URL:
+        return MEDIA_BASE_URL + filepath_to_uri(name)
+    return default_storage.url(name)
+
+
+def image_variant_urls(image_name, variants, context):
+    """
+    Resized copies of the image, smallest first, e.g.
+    {"webp": [{"width": 200, "url": "..."}, ...], "jpeg": [...]}
+    None if there is no image or the variants are not generated yet.
+    """
+    if not image_name or not variants or variants.get('source') != image_name:
+        return None
+    return {
+        format_name: [
+            {'width': variant['width'], 'url': media_url(variant['name'], context)}
+            for variant in variants[format_name]
+        ]
+        for format_name in ('webp', 'jpeg') if format_name in variants
+    }
+
 
 class UserSerializer(serializers.ModelSerializer):
     """
@@ -31,22 +95,28 @@ class UserSerializer(serializers.ModelSerializer):
 class FoodItemSerializer(serializers.ModelSerializer):
     """
     Serializer for FoodItem model.
-    Returns food item data with image URL.
+    Returns food item data with absolute image URLs.
+    Pass context={'request': request} unless MEDIA_BASE_URL is set; serializers
+    that nest this one (cart, order items) share that context.
     """
     image = serializers.SerializerMethodField()  # Use method to handle image URL
+    image_variants = serializers.SerializerMethodField()  # Smaller/WebP copies for srcset
     
     class Meta:
         model = FoodItem
-        fields = ['id', 'name', 'description', 'price', 'image', 'created_at']
+        fields = ['id', 'name', 'description', 'price', 'image', 'image_variants', 'created_at']
     
     def get_image(self, obj):
         """
         Return image URL if image exists, otherwise return None.
         """
         if obj.image:
-            # Return relative path - will be converted to absolute in view
-            return obj.image.url
+            return media_url(obj.image.name, self.context)
         return None
+    
+    def get_image_variants(self, obj):
+        """Resized copies of the image (see image_variant_urls)"""
+        return image_variant_urls(obj.image.name, obj.image_variants, self.context)
 
 
 class CartItemSerializer(serializers.ModelSerializer):
@@ -65,13 +135,24 @@ class CartItemSerializer(serializers.ModelSerializer):
 class OrderItemSerializer(serializers.ModelSerializer):
     """
     Serializer for OrderItem model.
-    Includes food item details in the response.
+    Name and image are the ones the food had when the order was placed
+    (stored on the line), so old orders don't change with the menu and
+    reading them never touches the food table. `food` is the food's id,
+    or null once it has been deleted from the menu.
     """
-    food = FoodItemSerializer(read_only=True)
+    name = serializers.CharField(source='food_name', read_only=True)
+    image = serializers.SerializerMethodField()
     
     class Meta:
         model = OrderItem
-        fields = ['id', 'food', 'quantity', 'price']
+        fields = ['id', 'food', 'name', 'image', 'quantity', 'price']
+        read_only_fields = ['food']
+    
+    def get_image(self, obj):
+        """URL of the image the food had when ordered, or None"""
+        if obj.food_image:
+            return media_url(obj.food_image, self.context)
+        return None
 
 
 class OrderSerializer(serializers.ModelSerializer):
@@ -83,7 +164,7 @@ class OrderSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Order
-        fields = ['id', 'user', 'total_price', 'created_at', 'items']
+        fields = ['id', 'user', 'total_price', 'status', 'created_at', 'items']
 
 
 
@@ -0,0 +1,90 @@
+"""
+Model signal handlers.
+These keep caches in sync whenever data is changed (e.g. from the admin panel).
+Note: queryset.update() and bulk_create() do not send these signals, so code
+using them must invalidate the caches itself.
+"""
+from django.contrib.auth.models import User
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import images, search, tracking
+from .authentication import invalidate_token, invalidate_user
+from .caching import menu_cache, order_cache
+from .models import FoodItem, Order, OrderItem
+
+
+@receiver([post_save, post_delete], sender=FoodItem)
+def invalidate_menu_cache(sender, **kwargs):
+    """Menu changed - bump the version so the next request rebuilds it"""
+    menu_cache.bump_on_commit()
+
+
+@receiver(post_save, sender=FoodItem)
+def create_image_variants(sender, instance, **kwargs):
+    """New or replaced photo - make the resized/WebP copies"""
+    images.refresh_variants(instance)
+
+
+@receiver(post_save, sender=FoodItem)
+def update_search_index(sender, instance, **kwargs):
+    """Keep the full-text search index in step with the menu"""
+    search.index_food(instance)
+
+
+@receiver(post_delete, sender=FoodItem)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.remove_food(instance.id)
+
+
+@receiver(post_delete, sender=FoodItem)
+def invalidate_order_history_food(sender, instance, **kwargs):
+    """Dish deleted - its order lines now have food=None, in anyone's history"""
+    order_cache.bump_on_commit()
+
+
+@receiver([post_save, post_delete], sender=Order)
+def invalidate_order_history(sender, instance, **kwargs):
+    """New or changed order - rebuild that user's order history pages"""
+    order_cache.bump_on_commit(scope=instance.user_id)
+
+
+@receiver(post_delete, sender=Order)
+def end_order_tracking(sender, instance, **kwargs):
+    """Order deleted - close the live status streams watching it"""
+    tracking.publish_removed(instance.id)
+
+
+@receiver([post_save, post_delete], sender=OrderItem)
+def invalidate_order_history_items(sender, instance, origin=None, **kwargs):
+    """Order line edited (e.g. in the admin) - same as above"""
+    if origin is not None and not _is_order_item_delete(origin):
+        return  # Deleted along with its order (or user); the Order signal bumps once
+    if OrderItem.order.is_cached(instance):
+        user_id = instance.order.user_id  # Admin inlines load lines through their order
+    else:
+        user_id = Order.objects.filter(id=instance.order_id).values_list('user_id', flat=True).first()
+    if user_id is not None:
+        order_cache.bump_on_commit(scope=user_id)
+
+
+def _is_order_item_delete(origin):
+    """Whether a delete started at order lines rather than cascading to them"""
+    if isinstance(origin, QuerySet):
+        return origin.model is OrderItem
+    return isinstance(origin, OrderItem)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Logout (or user deleted) - stop accepting the cached token"""
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """User changed (e.g. deactivated) - reload their tokens from the database"""
+    if not created:
+        invalidate_user(instance)
@@ -0,0 +1,357 @@
+"""
+Tests for the API.
+Run from backend/:
+    python manage.py test api
+
+QueryBudgetTests pin the number of database queries of the cart and checkout
+endpoints, for carts of 1, 5 and 50 lines: if a change makes the count grow
+with the cart (an N+1 query), these fail. The count includes the work run
+once the request's transaction commits (transaction.on_commit callbacks).
+"""
+import base64
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from .caching import clear_local_caches, menu_cache
+from .models import CartItem, FoodItem, Order, OrderItem
+
+CART_SIZES = (1, 5, 50)
+
+
+def create_foods(count, price='10.00'):
+    return FoodItem.objects.bulk_create([
+        FoodItem(name=f'Dish {number}', description=f'Description {number}', price=Decimal(price))
+        for number in range(count)
+    ])
+
+
+class APITestBase(APITestCase):
+
+    def setUp(self):
+        # The stored snapshot versions are rolled back after every test
+        clear_local_caches()
+        self.user = User.objects.create_user('customer', password='Test-pass-123')
+        self.client.force_authenticate(user=self.user)
+
+    def fill_cart(self, foods, quantity=2):
+        CartItem.objects.bulk_create([CartItem(user=self.user, food=food, quantity=quantity) for food in foods])
+
+
+class QueryBudgetTests(APITestBase):
+    """Queries per request must not depend on the number of cart lines"""
+
+    # Queries per request, whatever the cart size
+    CART_VIEW_QUERIES = 1        # cart rows joined with their food
+    CART_ADD_QUERIES = 5         # food, then UPDATE quantity and re-read the line in a savepoint
+    CART_ADD_NEW_QUERIES = 7     # food, UPDATE (no row) in a savepoint, INSERT in a savepoint
+    CART_UPDATE_QUERIES = 2      # line joined with food, UPDATE
+    CREATE_ORDER_QUERIES = 8     # checkout.place_order() (7), then bumping the user's order-history version
+
+    def setUp(self):
+        super().setUp()
+        self.foods = create_foods(max(CART_SIZES) + 1)
+
+    def check_budget(self, expected, request):
+        """Run request() once per cart size with a cart of that size"""
+        for size in CART_SIZES:
+            with self.subTest(cart_lines=size):
+                CartItem.objects.filter(user=self.user).delete()
+                self.fill_cart(self.foods[:size])
+                # Count the on_commit work too (cache invalidation), which
+                # the test case's transaction would otherwise never run
+                with self.assertNumQueries(expected), self.captureOnCommitCallbacks(execute=True):
+                    response = request()
+                self.assertLess(response.status_code, 300, response.content)
+
+    def test_cart_view(self):
+        self.check_budget(self.CART_VIEW_QUERIES, lambda: self.client.get('/api/cart/'))
+
+    @override_settings(FAST_SERIALIZERS=False)
+    def test_cart_view_drf_serializers(self):
+        self.check_budget(self.CART_VIEW_QUERIES, lambda: self.client.get('/api/cart/'))
+
+    def test_cart_add_existing_line(self):
+        food = self.foods[0]  # In every cart
+        self.check_budget(
+            self.CART_ADD_QUERIES,
+            lambda: self.client.post('/api/cart/add/', {'food_id': food.id, 'quantity': 1}, format='json'),
+        )
+
+    def test_cart_add_new_line(self):
+        food = self.foods[-1]  # In no cart
+        self.check_budget(
+            self.CART_ADD_NEW_QUERIES,
+            lambda: self.client.post('/api/cart/add/', {'food_id': food.id, 'quantity': 1}, format='json'),
+        )
+
+    def test_cart_update(self):
+        def update():
+            item = CartItem.objects.filter(user=self.user).first()
+            return self.client.put(f'/api/cart/update/{item.id}/', {'quantity': 3}, format='json')
+
+        # The lookup of the item to update is one extra query of the test itself
+        self.check_budget(self.CART_UPDATE_QUERIES + 1, update)
+
+    def test_create_order(self):
+        self.check_budget(self.CREATE_ORDER_QUERIES, lambda: self.client.post('/api/order/create/'))
+
+
+class CartTests(APITestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.pizza, self.salad = create_foods(2)
+
+    def test_add_twice_increments_one_line(self):
+        first = self.client.post('/api/cart/add/', {'food_id': self.pizza.id, 'quantity': 2}, format='json')
+        second = self.client.post('/api/cart/add/', {'food_id': self.pizza.id, 'quantity': 3}, format='json')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['quantity'], 5)
+        self.assertEqual(CartItem.objects.get(user=self.user).quantity, 5)
+
+    def test_add_rejects_bad_quantity_and_unknown_food(self):
+        for quantity in (0, -1, 1.5, 'two', True):
+            response = self.client.post('/api/cart/add/', {'food_id': self.pizza.id, 'quantity': quantity},
+                                        format='json')
+            self.assertEqual(response.status_code, 400, quantity)
+        response = self.client.post('/api/cart/add/', {'food_id': 999999}, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_update_quantity(self):
+        self.fill_cart([self.pizza], quantity=1)
+        item = CartItem.objects.get(user=self.user)
+        url = f'/api/cart/update/{item.id}/'
+        response = self.client.put(url, {'quantity': '3'}, format='json')  # Digit strings are fine
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['quantity'], 3)
+        for quantity in (None, 0, -2, 1.5, 'three', True):
+            response = self.client.put(url, {'quantity': quantity}, format='json')
+            self.assertEqual(response.status_code, 400, quantity)
+        self.assertEqual(CartItem.objects.get(id=item.id).quantity, 3)
+
+    def test_cart_total(self):
+        self.fill_cart([self.pizza, self.salad], quantity=3)
+        response = self.client.get('/api/cart/')
+        self.assertEqual(len(response.json()['items']), 2)
+        self.assertEqual(response.json()['total'], 60.0)
+
+    def test_batch_applies_operations_in_order(self):
+        self.fill_cart([self.pizza], quantity=1)
+        item = CartItem.objects.get(user=self.user)
+        response = self.client.post('/api/cart/batch/', {'operations': [
+            {'op': 'add', 'food_id': self.salad.id, 'quantity': 2},
+            {'op': 'add', 'food_id': self.salad.id},
+            {'op': 'set', 'item_id': item.id, 'quantity': 4},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        quantities = dict(CartItem.objects.filter(user=self.user).values_list('food_id', 'quantity'))
+        self.assertEqual(quantities, {self.pizza.id: 4, self.salad.id: 3})
+        self.assertEqual(response.json()['total'], 70.0)
+
+        response = self.client.post('/api/cart/batch/', [{'op': 'remove', 'food_id': self.pizza.id}], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(CartItem.objects.values_list('food_id', flat=True)), [self.salad.id])
+
+    def test_invalid_batch_changes_nothing(self):
+        self.fill_cart([self.pizza], quantity=1)
+        response = self.client.post('/api/cart/batch/', {'operations': [
+            {'op': 'add', 'food_id': self.salad.id},
+            {'op': 'add', 'food_id': 999999},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Operation 1', response.json()['error'])
+        self.assertEqual(list(CartItem.objects.values_list('food_id', 'quantity')), [(self.pizza.id, 1)])
+
+
+class CheckoutTests(APITestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.pizza, self.salad = create_foods(2)
+        self.salad.price = Decimal('4.50')
+        self.salad.save()
+
+    def test_order_snapshots_prices_and_clears_cart(self):
+        self.fill_cart([self.pizza], quantity=2)
+        self.fill_cart([self.salad], quantity=1)
+        response = self.client.post('/api/order/create/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['total_price'], '24.50')
+        self.assertFalse(CartItem.objects.filter(user=self.user).exists())
+
+        order = Order.objects.get(user=self.user)
+        lines = {line.food_id: line for line in order.items.all()}
+        self.assertEqual(lines[self.pizza.id].price, Decimal('10.00'))
+        self.assertEqual(lines[self.pizza.id].quantity, 2)
+        self.assertEqual(lines[self.salad.id].food_name, self.salad.name)
+
+        # A later price change doesn't touch the placed order
+        FoodItem.objects.filter(id=self.pizza.id).update(price=Decimal('99.00'))
+        order.refresh_from_db()
+        self.assertEqual(order.total_price, Decimal('24.50'))
+        self.assertEqual(OrderItem.objects.get(order=order, food=self.pizza).price, Decimal('10.00'))
+
+    def test_price_at_checkout_is_used(self):
+        self.fill_cart([self.pizza], quantity=1)
+        FoodItem.objects.filter(id=self.pizza.id).update(price=Decimal('11.25'))
+        response = self.client.post('/api/order/create/')
+        self.assertEqual(response.data['total_price'], '11.25')
+
+    def test_empty_cart(self):
+        response = self.client.post('/api/order/create/')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+
+
+class MenuTests(APITestBase):
+
+    def test_cursor_pagination_visits_every_item_once(self):
+        foods = create_foods(45)  # bulk_create: many share a created_at
+        seen = []
+        url = '/api/foods/?limit=20'
+        while url:
+            page = self.client.get(url).json()
+            self.assertLessEqual(len(page['results']), 20)
+            seen.extend(food['id'] for food in page['results'])
+            url = page['next']
+        self.assertEqual(sorted(seen), sorted(food.id for food in foods))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_default_and_maximum_page_size(self):
+        create_foods(120)
+        self.assertEqual(len(self.client.get('/api/foods/').json()['results']), 20)
+        self.assertEqual(len(self.client.get('/api/foods/?limit=500').json()['results']), 100)
+        self.assertEqual(self.client.get('/api/foods/?cursor=not-a-cursor').status_code, 400)
+
+    def test_cursor_spellings_share_a_cached_page(self):
+        create_foods(30)
+        next_url = self.client.get('/api/foods/').json()['next']
+        cursor = parse_qs(urlsplit(next_url).query)['cursor'][0]
+        created_at, food_id = json.loads(base64.urlsafe_b64decode(cursor))
+        respelled = base64.urlsafe_b64encode(json.dumps([created_at, str(food_id)], indent=1).encode()).decode()
+
+        misses = menu_cache.misses
+        first = self.client.get('/api/foods/', {'cursor': cursor})
+        second = self.client.get('/api/foods/', {'cursor': respelled, 'limit': '20'})
+        self.assertEqual(menu_cache.misses, misses + 1)
+        self.assertEqual(first.content, second.content)
+
+    @override_settings(ALLOWED_HOSTS=['a.example', 'b.example'])
+    @mock.patch('api.serializers.MEDIA_BASE_URL', 'https://cdn.example/')
+    def test_next_link_uses_each_requests_host(self):
+        # With a media CDN the items are the same for every host; the link isn't
+        create_foods(30)
+        for host in ('a.example', 'b.example'):
+            next_url = self.client.get('/api/foods/', HTTP_HOST=host).json()['next']
+            self.assertTrue(next_url.startswith(f'http://{host}/api/foods/?'), next_url)
+
+    def test_etag_and_not_modified(self):
+        food, = create_foods(1)
+        response = self.client.get('/api/foods/')
+        etag = response['ETag']
+        # A cached page costs no query while the menu version is remembered
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/foods/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # An edit bumps the menu version once the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            food.name = 'Renamed'
+            food.save()
+        response = self.client.get('/api/foods/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['results'][0]['name'], 'Renamed')
+
+    def test_food_detail(self):
+        food, = create_foods(1)
+        self.assertEqual(self.client.get(f'/api/foods/{food.id}/').json()['name'], food.name)
+        self.assertEqual(self.client.get('/api/foods/999999/').status_code, 404)
+
+
+class OrderHistoryTests(APITestBase):
+
+    def test_lines_keep_name_after_dish_is_deleted(self):
+        food, = create_foods(1)
+        self.fill_cart([food])
+        self.client.post('/api/order/create/')
+        self.assertEqual(self.client.get('/api/orders/').json()['results'][0]['items'][0]['food'], food.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            food.delete()
+        self.assertEqual(Order.objects.count(), 1)
+        item = self.client.get('/api/orders/').json()['results'][0]['items'][0]
+        self.assertIsNone(item['food'])
+        self.assertEqual(item['name'], 'Dish 0')
+        self.assertEqual(item['price'], '10.00')
+
+
+@override_settings(METRICS_TOKEN='scrape-secret')
+class MetricsAccessTests(APITestBase):
+
+    def test_token_or_staff_required(self):
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()['error'], 'A metrics token or staff authentication is required')
+
+        response = self.client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()['error'], 'Invalid metrics token')
+
+        response = self.client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+
+
+class ImportMenuTests(APITestBase):
+
+    def import_file(self, suffix, content):
+        with tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False) as file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        call_command('import_menu', file.name, stdout=StringIO(), stderr=StringIO())
+
+    def menu(self):
+        return {
+            sku: (name, str(price), description)
+            for sku, name, price, description
+            in FoodItem.objects.values_list('sku', 'name', 'price', 'description')
+        }
+
+    def test_creates_then_updates_by_sku(self):
+        self.import_file('.csv', 'sku,name,price,description\nA1,Soup,3.50,Hot soup\nB2,Bread,1.20,Fresh\n')
+        self.import_file('.jsonl', '{"sku": "A1", "name": "Soup", "price": "4.00", "description": "New"}\n'
+                                   '{"sku": "C3", "name": "Tea", "price": "2"}\n')
+        self.assertEqual(self.menu(), {
+            'A1': ('Soup', '4.00', 'New'),
+            'B2': ('Bread', '1.20', 'Fresh'),
+            'C3': ('Tea', '2.00', ''),
+        })
+
+    def test_file_without_description_keeps_descriptions(self):
+        self.import_file('.csv', 'sku,name,price,description\nA1,Soup,3.50,Hot soup\n')
+        self.import_file('.csv', 'sku,name,price\nA1,Soup,3.75\n')
+        self.assertEqual(self.menu(), {'A1': ('Soup', '3.75', 'Hot soup')})
+
+    def test_bad_rows_are_skipped(self):
+        self.import_file('.csv', 'sku,name,price\nA1,Soup,3.50\n,No sku,1\nB2,Bad price,abc\nC3,,1\n')
+        self.assertEqual(list(self.menu()), ['A1'])
+
+    def test_import_refreshes_the_menu(self):
+        etag = self.client.get('/api/foods/')['ETag']
+        self.import_file('.csv', 'sku,name,price\nA1,Soup,3.50\n')
+        response = self.client.get('/api/foods/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([food['name'] for food in response.json()['results']], ['Soup'])
@@ -0,0 +1,103 @@
+"""
+Small helpers for timing the phases of a request.
+Results can be logged or sent to the browser as a Server-Timing header.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+class PhaseTimer:
+    """
+    Records how long each named phase took, in milliseconds.
+
+    Usage:
+        timer = PhaseTimer()
+        with timer.phase('lock'):
+            ...
+        timer.timings  -> {'lock': 1.42}
+    """
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    def total(self):
+        return sum(self.timings.values())
+
+    def server_timing(self, prefix=''):
+        """Format as a Server-Timing header value, e.g. 'lock;dur=1.42, write;dur=3.10'"""
+        return ', '.join(
+            f'{prefix}{name};dur={duration:.2f}' for name, duration in self.timings.items()
+        )
+
+
+class RequestTimer(PhaseTimer):
+    """
+    PhaseTimer for a whole request (see api/middleware.py), which also counts
+    the database queries run while it is current. Phase times leave out the
+    time spent in queries, so 'serialize' is the serializers' own work even
+    when their querysets are evaluated inside the phase.
+    """
+
+    def __init__(self, label=''):
+        super().__init__()
+        self.label = label  # e.g. "GET /api/cart/", for log lines
+        self.queries = 0
+        self.db_ms = 0.0
+
+    def add_query(self, duration):
+        self.queries += 1
+        self.db_ms += duration
+
+    @contextmanager
+    def phase(self, name):
+        db_before = self.db_ms
+        try:
+            with super().phase(name):
+                yield
+        finally:
+            self.timings[name] -= self.db_ms - db_before
+
+
+# The RequestTimer of the request being handled (None outside a request).
+# A context variable follows the request into sync_to_async threads too.
+current_timer = ContextVar('current_timer', default=None)
+
+
+@contextmanager
+def record_phase(name):
+    """
+    Time a block as part of the current request, e.g.
+        with record_phase('serialize'):
+            data = serializer.data
+    Does nothing outside a timed request.
+    """
+    timer = current_timer.get()
+    if timer is None:
+        yield
+        return
+    with timer.phase(name):
+        yield
+
+
+def percentiles(samples, points=(50, 95, 99)):
+    """
+    Nearest-rank percentiles of a list of numbers, e.g. {'p50': .., 'p95': .., 'p99': ..}
+    """
+    if not samples:
+        return {f'p{point}': None for point in points}
+    ordered = sorted(samples)
+    result = {}
+    for point in points:
+        rank = max(1, -(-point * len(ordered) // 100))  # ceil without floats
+        result[f'p{point}'] = round(ordered[rank - 1], 3)
+    return result
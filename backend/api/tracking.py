@@ -0,0 +1,90 @@
+"""
+Order tracking - moves an order through its lifecycle and tells whoever is watching.
+
+    placed -> preparing -> out_for_delivery -> delivered
+
+Orders only move forward (a step may be skipped, e.g. straight to delivered).
+Each change is a single conditional UPDATE. Once it commits, the order
+history cache of that user is invalidated and the new status is published
+to the order's channel (api/pubsub.py). The frontend listens on
+GET /api/orders/<id>/events/ instead of polling the database.
+"""
+from django.db import transaction
+
+from .caching import order_cache
+from .models import Order
+from .pubsub import get_broker
+
+# The lifecycle, in order
+STATUSES = [choice for choice, _ in Order.STATUS_CHOICES]
+
+
+class InvalidStatusChange(Exception):
+    """Raised for an unknown status or a move backwards"""
+
+
+def is_final(status):
+    """Nothing happens to a delivered order any more"""
+    return status == STATUSES[-1]
+
+
+def channel_name(order_id):
+    """The pub/sub channel an order's status changes are published on"""
+    return f'order:{order_id}'
+
+
+def status_event(order_id, status):
+    """The message sent to subscribers (and as SSE data to the browser)"""
+    return {
+        'order': order_id,
+        'status': status,
+        'label': dict(Order.STATUS_CHOICES)[status],
+        'final': is_final(status),
+    }
+
+
+def untracked_event(order_id):
+    """
+    Sent instead of a status when the order was deleted (or has a status we
+    don't know): final, so the stream ends and the browser stops watching.
+    """
+    return {
+        'order': order_id,
+        'status': None,
+        'label': 'Order can no longer be tracked',
+        'final': True,
+    }
+
+
+def publish_removed(order_id):
+    """Tell the order's watchers it is gone, once the delete commits"""
+    transaction.on_commit(
+        lambda: get_broker().publish(channel_name(order_id), untracked_event(order_id))
+    )
+
+
+def set_status(order, status):
+    """
+    Move `order` to `status`. Returns True if it changed, False if the order
+    already had that status. Raises InvalidStatusChange for a move backwards.
+    """
+    if status not in STATUSES:
+        raise InvalidStatusChange(f'Unknown status "{status}"')
+
+    # Only statuses before the new one can move to it. The filter makes this
+    # safe against two people changing the same order at the same time.
+    earlier = STATUSES[:STATUSES.index(status)]
+    changed = Order.objects.filter(id=order.id, status__in=earlier).update(status=status)
+    if not changed:
+        current = Order.objects.filter(id=order.id).values_list('status', flat=True).first()
+        if current == status:
+            return False
+        raise InvalidStatusChange(f'Order #{order.id} is already "{current}"')
+
+    order.status = status
+    # update() sends no signals, so invalidate and notify here
+    order_cache.bump_on_commit(scope=order.user_id)
+    transaction.on_commit(
+        lambda: get_broker().publish(channel_name(order.id), status_event(order.id, status))
+    )
+    return True
@@ -2,30 +2,46 @@
 URL configuration for API app.
 This file maps URLs to our API views.
 """
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Read-heavy endpoints: async views under ASGI (ASYNC_VIEWS=true), else the normal ones
+reads = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
     # Root API endpoint - shows API is working
     path('', views.api_root, name='api_root'),
     
     # Health check endpoint
-    path('health/', views.health_check, name='health_check'),
+    path('health/', reads.health_check, name='health_check'),
+    # Prometheus metrics (see api/metrics.py)
+    path('metrics/', views.metrics_view, name='metrics'),
     
     # User authentication
     path('register/', views.register_user, name='register'),
     path('login/', views.login_user, name='login'),
+    path('logout/', views.logout_user, name='logout'),
     
     # Food items
-    path('foods/', views.food_list, name='food_list'),
+    path('foods/', reads.food_list, name='food_list'),
+    path('foods/search/', views.food_search, name='food_search'),
+    path('foods/<int:food_id>/', views.food_detail, name='food_detail'),
     
     # Cart operations
-    path('cart/', views.cart_view, name='cart'),
+    path('cart/', reads.cart_view, name='cart'),
     path('cart/add/', views.cart_add, name='cart_add'),
     path('cart/update/<int:item_id>/', views.cart_update, name='cart_update'),
+    path('cart/batch/', views.cart_batch, name='cart_batch'),
     
     # Orders
     path('order/create/', views.create_order, name='create_order'),
+    path('orders/', reads.order_list, name='order_list'),
+    path('orders/export/', views.order_export, name='order_export'),
+    path('orders/<int:order_id>/', views.order_detail, name='order_detail'),
+    path('orders/<int:order_id>/status/', views.order_status_update, name='order_status_update'),
+    # Live status stream (Server-Sent Events); async only, best served by uvicorn
+    path('orders/<int:order_id>/events/', async_views.order_events, name='order_events'),
 ]
 
 
@@ -4,17 +4,37 @@ These views define what happens when frontend calls our API endpoints.
 """
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError
+from django.db.models import Prefetch
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.crypto import constant_time_compare
+from django.utils.http import parse_etags
+from . import exports, fast_serializers, metrics, search, tracking
+from .caching import menu_cache, order_cache, search_cache
+from .cart import CartBatchError, add_to_cart, apply_batch, parse_quantity
+from .checkout import EmptyCartError, place_order
+from .pagination import KeysetPaginator
+from .timing import record_phase
+from .writequeue import single_writer
 from .models import FoodItem, CartItem, Order, OrderItem
 from .serializers import (
     UserSerializer, FoodItemSerializer, CartItemSerializer,
-    OrderSerializer, OrderItemSerializer
+    OrderSerializer, OrderItemSerializer, media_origin
 )
 
+# Menu pages: ?limit= defaults to 20, at most 100 items per page
+food_paginator = KeysetPaginator(default_limit=20, max_limit=100)
+
+# Order history pages: 10 orders by default, at most 50
+order_paginator = KeysetPaginator(default_limit=10, max_limit=50)
+
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -30,10 +50,20 @@ def api_root(request):
             'health': '/api/health/',
             'register': '/api/register/',
             'login': '/api/login/',
+            'logout': '/api/logout/',
             'foods': '/api/foods/',
+            'food_detail': '/api/foods/<id>/',
+            'food_search': '/api/foods/search/?q=',
             'cart': '/api/cart/',
             'cart_add': '/api/cart/add/',
+            'cart_batch': '/api/cart/batch/',
             'order_create': '/api/order/create/',
+            'orders': '/api/orders/',
+            'order_detail': '/api/orders/<id>/',
+            'order_events': '/api/orders/<id>/events/',
+            'order_status': '/api/orders/<id>/status/',
+            'order_export': '/api/orders/export/?start=&end=',
+            'metrics': '/api/metrics/',
         },
         'version': '1.0.0'
     })
@@ -52,6 +82,28 @@ def health_check(request):
     })
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def metrics_view(request):
+    """
+    Request, latency, database and cache metrics of all workers, for Prometheus.
+    GET /api/metrics/
+    Staff users only, or a scraper sending "Authorization: Bearer <METRICS_TOKEN>"
+    (when METRICS_TOKEN is set).
+    """
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    token_sent = bool(settings.METRICS_TOKEN) and authorization.startswith('Bearer ')
+    scraper = token_sent and constant_time_compare(authorization, f'Bearer {settings.METRICS_TOKEN}')
+    if not scraper and not request.user.is_staff:
+        if token_sent:
+            return Response({'error': 'Invalid metrics token'}, status=status.HTTP_403_FORBIDDEN)
+        return Response(
+            {'error': 'A metrics token or staff authentication is required'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    return HttpResponse(metrics.render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def register_user(request):
@@ -108,28 +160,79 @@ def login_user(request):
     )
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def logout_user(request):
+    """
+    Logout - deletes the user's token so it can no longer be used.
+    POST /api/logout/
+    """
+    Token.objects.filter(user=request.user).delete()
+    return Response({'message': 'Logged out successfully'})
+
+
+def _snapshot_response(request, snapshot, cache_control='public, no-cache'):
+    """
+    Return a cached JSON snapshot, or 304 Not Modified when the client
+    already holds the same ETag.
+    Use cache_control='private, no-cache' for per-user data.
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        if '*' in etags or snapshot.etag in etags:
+            response = HttpResponseNotModified()
+            response['ETag'] = snapshot.etag
+            return response
+
+    response = HttpResponse(snapshot.body, content_type='application/json')
+    response['ETag'] = snapshot.etag
+    response['Cache-Control'] = cache_control  # no-cache = always revalidate with ETag
+    return response
+
+
+def _menu_rows():
+    """All food items: .values() rows for the fast serializers, else model instances"""
+    if settings.FAST_SERIALIZERS:
+        return fast_serializers.food_rows(FoodItem.objects.all())
+    return FoodItem.objects.all()
+
+
+def _menu_data(request, foods):
+    """Serialize rows taken from _menu_rows()"""
+    context = {'request': request}
+    if settings.FAST_SERIALIZERS:
+        return fast_serializers.food_list_data(foods, context)
+    return FoodItemSerializer(foods, many=True, context=context).data
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def food_list(request):
     """
-    Get list of all food items.
-    GET /api/foods/
+    Get the menu, one page at a time.
+    GET /api/foods/?limit=20&cursor=<next cursor>
+    Returns {"results": [...], "next": <url of next page or null>};
+    limit defaults to 20 and is at most 100.
     No authentication required (anyone can see the menu).
+    Rendered pages are cached until a FoodItem changes (see api/signals.py).
     """
     try:
-        foods = FoodItem.objects.all()
-        serializer = FoodItemSerializer(foods, many=True)
-        
-        # Update image URLs to include full path
-        data = serializer.data
-        for item in data:
-            if item.get('image'):
-                # If image path is relative, make it absolute
-                if item['image'] and not item['image'].startswith('http'):
-                    request_scheme = 'https' if request.is_secure() else 'http'
-                    item['image'] = f"{request_scheme}://{request.get_host()}{item['image']}"
-        
-        return Response(data)
+        try:
+            # Includes the host: media URLs and the "next" link are absolute
+            page = food_paginator.page_key(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        def build_page():
+            foods, next_cursor = food_paginator.paginate(request, _menu_rows())
+            return {
+                'results': _menu_data(request, foods),
+                'next': food_paginator.get_next_link(request, next_cursor),
+            }
+
+        snapshot = menu_cache.get_or_build(('food_page', page), build_page)
+        return _snapshot_response(request, snapshot)
     except Exception as e:
         # Log error for debugging
         import traceback
@@ -141,6 +244,86 @@ def food_list(request):
         )
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def food_search(request):
+    """
+    Search the menu by name and description.
+    GET /api/foods/search/?q=marg piz&limit=20
+    Every word must match; words may be unfinished (prefix match).
+    Best matches first. No authentication required.
+    """
+    query = ' '.join(search.tokenize(request.query_params.get('q', '')))
+    if not query:
+        return Response(
+            {'error': 'Search query (q) is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', 20)), 50))
+    except ValueError:
+        return Response({'error': 'Invalid limit'}, status=status.HTTP_400_BAD_REQUEST)
+
+    origin = media_origin(request)
+
+    def build():
+        food_ids = search.search_food_ids(query, limit)
+        foods = FoodItem.objects.in_bulk(food_ids)
+        ranked = [foods[food_id] for food_id in food_ids if food_id in foods]
+        serializer = FoodItemSerializer(ranked, many=True, context={'request': request})
+        return serializer.data
+
+    snapshot = search_cache.get_or_build(('food_search', origin, query, limit), build)
+    return _snapshot_response(request, snapshot)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def food_detail(request, food_id):
+    """
+    Get a single food item.
+    GET /api/foods/{food_id}/
+    No authentication required.
+    """
+    origin = media_origin(request)
+
+    def build():
+        food = FoodItem.objects.get(id=food_id)
+        serializer = FoodItemSerializer(food, context={'request': request})
+        return serializer.data
+
+    try:
+        # A missing item raises inside build(), so 404s are never cached
+        snapshot = menu_cache.get_or_build(('food_detail', origin, food_id), build)
+    except FoodItem.DoesNotExist:
+        return Response(
+            {'error': 'Food item not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return _snapshot_response(request, snapshot)
+
+
+def _cart_data(request):
+    """Serialized cart with its total, as returned by GET /api/cart/"""
+    context = {'request': request}
+    with record_phase('serialize'):
+        if settings.FAST_SERIALIZERS:
+            items, total = fast_serializers.cart_data(request.user, context)
+        else:
+            # One query: cart rows joined with their food items
+            cart_items = list(
+                CartItem.objects.filter(user=request.user).select_related('food')
+            )
+            items = CartItemSerializer(cart_items, many=True, context=context).data
+            # Calculate total price (food is already loaded, no extra queries)
+            total = sum(item.food.price * item.quantity for item in cart_items)
+    
+    return {
+        'items': items,
+        'total': float(total)
+    }
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def cart_view(request):
@@ -150,16 +333,7 @@ def cart_view(request):
     Requires authentication (user must be logged in).
     """
     try:
-        cart_items = CartItem.objects.filter(user=request.user)
-        serializer = CartItemSerializer(cart_items, many=True)
-        
-        # Calculate total price
-        total = sum(item.food.price * item.quantity for item in cart_items)
-        
-        return Response({
-            'items': serializer.data,
-            'total': float(total)
-        })
+        return Response(_cart_data(request))
     except Exception as e:
         import traceback
         import logging
@@ -174,6 +348,7 @@ def cart_view(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@single_writer
 def cart_add(request):
     """
     Add a food item to cart.
@@ -181,7 +356,13 @@ def cart_add(request):
     Body: {"food_id": 1, "quantity": 2}
     """
     food_id = request.data.get('food_id')
-    quantity = request.data.get('quantity', 1)
+    quantity = parse_quantity(request.data.get('quantity', 1))
+    
+    if quantity is None:
+        return Response(
+            {'error': 'Invalid quantity'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     
     try:
         food = FoodItem.objects.get(id=food_id)
@@ -191,24 +372,17 @@ def cart_add(request):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    # Get or create cart item (if exists, update quantity)
-    cart_item, created = CartItem.objects.get_or_create(
-        user=request.user,
-        food=food,
-        defaults={'quantity': quantity}
-    )
+    # Insert the cart item, or increase its quantity inside the database
+    # (safe when the same user sends several adds at once)
+    cart_item, created = add_to_cart(request.user, food, quantity)
     
-    if not created:
-        # Item already in cart, increase quantity
-        cart_item.quantity += quantity
-        cart_item.save()
-    
-    serializer = CartItemSerializer(cart_item)
+    serializer = CartItemSerializer(cart_item, context={'request': request})
     return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
 
 @api_view(['PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
+@single_writer
 def cart_update(request, item_id):
     """
     Update or delete a cart item.
@@ -216,7 +390,7 @@ def cart_update(request, item_id):
     DELETE /api/cart/update/{item_id}/ - Remove item
     """
     try:
-        cart_item = CartItem.objects.get(id=item_id, user=request.user)
+        cart_item = CartItem.objects.select_related('food').get(id=item_id, user=request.user)
     except CartItem.DoesNotExist:
         return Response(
             {'error': 'Cart item not found'},
@@ -225,11 +399,11 @@ def cart_update(request, item_id):
     
     if request.method == 'PUT':
         # Update quantity
-        new_quantity = request.data.get('quantity')
-        if new_quantity and new_quantity > 0:
+        new_quantity = parse_quantity(request.data.get('quantity'), default=None)
+        if new_quantity is not None:
             cart_item.quantity = new_quantity
             cart_item.save()
-            serializer = CartItemSerializer(cart_item)
+            serializer = CartItemSerializer(cart_item, context={'request': request})
             return Response(serializer.data)
         return Response(
             {'error': 'Invalid quantity'},
@@ -247,6 +421,40 @@ def cart_update(request, item_id):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@single_writer
+def cart_batch(request):
+    """
+    Apply several cart changes at once and return the updated cart.
+    POST /api/cart/batch/
+    Body: {"operations": [
+        {"op": "add", "food_id": 1, "quantity": 2},
+        {"op": "set", "item_id": 5, "quantity": 3},
+        {"op": "remove", "item_id": 7}
+    ]}
+    All operations are applied in one transaction - if one is invalid, none are.
+    """
+    # Accept {"operations": [...]} or a bare list of operations
+    operations = request.data
+    if hasattr(operations, 'get'):
+        operations = operations.get('operations')
+    
+    try:
+        apply_batch(request.user, operations)
+    except CartBatchError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except IntegrityError:
+        # Another request added the same item at the same moment
+        return Response(
+            {'error': 'Cart was changed by another request, please retry'},
+            status=status.HTTP_409_CONFLICT
+        )
+    
+    return Response(_cart_data(request))
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@single_writer
 def create_order(request):
     """
     Create an order from current cart.
@@ -254,40 +462,20 @@ def create_order(request):
     This will create an order with all items in the user's cart and clear the cart.
     """
     try:
-        cart_items = CartItem.objects.filter(user=request.user)
+        # Lock cart, snapshot prices, write order + items, clear cart (one transaction)
+        order, timer = place_order(request.user)
         
-        if not cart_items.exists():
-            return Response(
-                {'error': 'Cart is empty'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Calculate total price
-        total_price = sum(item.food.price * item.quantity for item in cart_items)
-        
-        # Create order
-        order = Order.objects.create(
-            user=request.user,
-            total_price=total_price
+        # Return order details (items are already loaded)
+        with record_phase('serialize'):
+            data = OrderSerializer(order, context={'request': request}).data
+        response = Response(data, status=status.HTTP_201_CREATED)
+        response['Server-Timing'] = timer.server_timing(prefix='checkout-')
+        return response
+    except EmptyCartError:
+        return Response(
+            {'error': 'Cart is empty'},
+            status=status.HTTP_400_BAD_REQUEST
         )
-        
-        # Create order items from cart items
-        order_items = []
-        for cart_item in cart_items:
-            order_item = OrderItem.objects.create(
-                order=order,
-                food=cart_item.food,
-                quantity=cart_item.quantity,
-                price=cart_item.food.price
-            )
-            order_items.append(order_item)
-        
-        # Clear cart after creating order
-        cart_items.delete()
-        
-        # Return order details
-        serializer = OrderSerializer(order)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
     except Exception as e:
         import traceback
         import logging
@@ -300,8 +488,122 @@ def create_order(request):
         )
 
 
+def _orders_with_items(user):
+    """A user's orders with their items loaded in two queries total (no join with the menu)"""
+    return Order.objects.filter(user=user).prefetch_related(
+        # Ordered by id, like fast_serializers.order_list_data()
+        Prefetch('items', queryset=OrderItem.objects.order_by('id'))
+    )
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def order_list(request):
+    """
+    Get the current user's past orders, newest first.
+    GET /api/orders/?limit=20&cursor=<next cursor>
+    Returns {"results": [...], "next": <url of next page or null>}.
+    """
+    try:
+        page = order_paginator.page_key(request)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    def build():
+        context = {'request': request}
+        if settings.FAST_SERIALIZERS:
+            rows = fast_serializers.order_rows(Order.objects.filter(user=request.user))
+            orders, next_cursor = order_paginator.paginate(request, rows)
+            results = fast_serializers.order_list_data(orders, context)
+        else:
+            orders, next_cursor = order_paginator.paginate(request, _orders_with_items(request.user))
+            results = OrderSerializer(orders, many=True, context=context).data
+        return {
+            'results': results,
+            'next': order_paginator.get_next_link(request, next_cursor),
+        }
+
+    # Pages only change when this user's orders change. Lines keep their own
+    # copy of the food's name and image, so menu edits don't matter; only
+    # deleting a dish does (its lines lose their food id), which bumps the
+    # global order_cache version (part of every user's version).
+    key = ('order_list', page)
+    snapshot = order_cache.get_or_build(key, build, scope=request.user.id)
+    return _snapshot_response(request, snapshot, cache_control='private, no-cache')
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def order_detail(request, order_id):
+    """
+    Get one of the current user's orders.
+    GET /api/orders/{order_id}/
+    """
+    def build():
+        order = _orders_with_items(request.user).get(id=order_id)
+        return OrderSerializer(order, context={'request': request}).data
+
+    try:
+        key = ('order_detail', media_origin(request), order_id)
+        snapshot = order_cache.get_or_build(key, build, scope=request.user.id)
+    except Order.DoesNotExist:
+        return Response(
+            {'error': 'Order not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return _snapshot_response(request, snapshot, cache_control='private, no-cache')
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+@single_writer
+def order_status_update(request, order_id):
+    """
+    Move an order to the next stage (staff only, e.g. the kitchen app).
+    POST /api/orders/{order_id}/status/
+    Body: {"status": "preparing"} - one of placed, preparing, out_for_delivery, delivered
+    Customers watching the order get the change through /api/orders/{order_id}/events/.
+    """
+    try:
+        order = Order.objects.only('id', 'user_id', 'status').get(id=order_id)
+    except Order.DoesNotExist:
+        return Response(
+            {'error': 'Order not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    try:
+        tracking.set_status(order, request.data.get('status'))
+    except tracking.InvalidStatusChange as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(tracking.status_event(order.id, order.status))
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def order_export(request):
+    """
+    Download order lines for reporting (staff only).
+    GET /api/orders/export/?start=2026-09-01&end=2026-09-30&output=csv
+    start/end are dates (both included, both optional); output is csv (default) or jsonl.
+    The file is streamed while the database is read in chunks (see api/exports.py),
+    so a month of orders doesn't have to fit in memory.
+    """
+    file_format = request.query_params.get('output', 'csv')
+    if file_format not in exports.FORMATS:
+        return Response(
+            {'error': f'output must be one of: {", ".join(exports.FORMATS)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    start, end = request.query_params.get('start'), request.query_params.get('end')
+    try:
+        since, until = exports.parse_date_range(start, end)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    pieces = exports.render(exports.export_rows(since, until), file_format)
+    if isinstance(request._request, ASGIRequest):
+        pieces = exports.streamed_async(pieces)
+    response = StreamingHttpResponse(pieces, content_type=exports.FORMATS[file_format][0])
+    response['Content-Disposition'] = f'attachment; filename="{exports.filename(file_format, start, end)}"'
+    return response
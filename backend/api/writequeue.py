@@ -0,0 +1,63 @@
+"""
+Single-writer queue for SQLite.
+SQLite allows only one writer at a time. Instead of letting many requests
+race for the lock (and retry or fail with "database is locked"), write-heavy
+views can wait their turn here. The queue covers all threads in a process,
+and, where fcntl is available, all gunicorn worker processes too (a file
+lock next to the database file).
+
+Enabled with SQLITE_SINGLE_WRITER=true; does nothing on other databases.
+"""
+import functools
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+try:
+    import fcntl
+except ImportError:  # Windows - only threads in this process are queued
+    fcntl = None
+
+_thread_lock = threading.Lock()
+_lock_file = None
+
+
+def is_enabled():
+    return settings.SQLITE_SINGLE_WRITER and connection.vendor == 'sqlite'
+
+
+def _get_lock_file():
+    """Open (once per process) the lock file that sits next to the database"""
+    global _lock_file
+    if _lock_file is None:
+        _lock_file = open(f"{connection.settings_dict['NAME']}.writelock", 'a')
+    return _lock_file
+
+
+@contextmanager
+def write_lock():
+    """Hold the single-writer lock for the duration of the block"""
+    if not is_enabled():
+        yield
+        return
+
+    with _thread_lock:
+        lock_file = _get_lock_file() if fcntl else None
+        if lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def single_writer(func):
+    """Decorator: run `func` while holding the single-writer lock"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with write_lock():
+            return func(*args, **kwargs)
+    return wrapper
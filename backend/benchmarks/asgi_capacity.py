@@ -0,0 +1,178 @@
+"""
+Concurrent-connection capacity: WSGI (gunicorn threads) vs ASGI (uvicorn + async views).
+
+Starts each deployment with the same number of worker processes (the same
+memory budget) on a fresh SQLite database, then runs waves of simulated
+clients against it. Each client repeatedly:
+  - opens a connection and sends half of its request,
+  - waits --slow-ms (a slow mobile uplink),
+  - sends the rest and reads the response.
+With more clients than WSGI threads, this shows whether a server holds a
+thread per waiting connection. Compare the numbers on the machine you deploy
+to: with few CPU cores both servers end up CPU bound and the extra event
+loop / thread hand-offs of ASGI make it slower per request.
+
+Requests rotate over the endpoints that have async versions:
+/api/health/, /api/foods/?limit=20, /api/cart/ and /api/orders/.
+Prints, per server and number of clients, requests/s, errors, latency
+percentiles (ms) and the servers' total resident memory, as JSON.
+
+Usage (from backend/):
+    python benchmarks/asgi_capacity.py --workers 2 --threads 4 --clients 16 64 256
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from serializer_throughput import create_data, setup_django  # noqa: E402
+
+PATHS = ['/api/health/', '/api/foods/?limit=20', '/api/cart/', '/api/orders/']
+
+
+def server_command(kind, args, port):
+    bind = ['-b', f'127.0.0.1:{port}', '-w', str(args.workers), '--backlog', '4096']
+    if kind == 'wsgi':
+        return ['gunicorn', 'fooddelivery.wsgi:application', '--threads', str(args.threads)] + bind
+    return ['gunicorn', 'fooddelivery.asgi:application', '-k', 'uvicorn.workers.UvicornWorker'] + bind
+
+
+def resident_memory_mb(pid):
+    """RSS of a process and its children, in MB (Linux /proc)"""
+    total = 0
+    pids = [pid]
+    while pids:
+        current = pids.pop()
+        try:
+            with open(f'/proc/{current}/status') as status:
+                for line in status:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+            for task in os.listdir(f'/proc/{current}/task'):
+                with open(f'/proc/{current}/task/{task}/children') as children:
+                    pids.extend(int(child) for child in children.read().split())
+        except FileNotFoundError:
+            pass
+    return round(total / 1024, 1)
+
+
+async def one_request(port, path, token, slow_seconds, timeout):
+    """Send one slow-uplink request; return (status, seconds)"""
+    started = time.perf_counter()
+    reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+    try:
+        request = (f'GET {path} HTTP/1.1\r\nHost: localhost\r\n'
+                   f'Authorization: Token {token}\r\nConnection: close\r\n\r\n').encode()
+        half = len(request) // 2
+        writer.write(request[:half])
+        await writer.drain()
+        await asyncio.sleep(slow_seconds)
+        writer.write(request[half:])
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+        status = int(response.split(b' ', 2)[1]) if response else 0
+        return status, time.perf_counter() - started
+    finally:
+        writer.close()
+
+
+async def run_wave(port, token, clients, duration, slow_seconds, timeout):
+    """`clients` concurrent clients for `duration` seconds"""
+    latencies = []
+    errors = 0
+    stop_at = time.perf_counter() + duration
+
+    async def client(number):
+        nonlocal errors
+        request_number = number
+        while time.perf_counter() < stop_at:
+            path = PATHS[request_number % len(PATHS)]
+            request_number += 1
+            try:
+                status, seconds = await one_request(port, path, token, slow_seconds, timeout)
+            except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+                errors += 1
+                continue
+            if status == 200:
+                latencies.append(seconds * 1000)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[client(number) for number in range(clients)])
+    return latencies, errors, time.perf_counter() - started
+
+
+def wait_until_up(port, timeout=30):
+    import urllib.request
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api/health/', timeout=2).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f'server on port {port} did not start')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=2, help='processes per server (same for both)')
+    parser.add_argument('--threads', type=int, default=4, help='threads per WSGI worker')
+    parser.add_argument('--clients', type=int, nargs='+', default=[16, 64, 256])
+    parser.add_argument('--duration', type=float, default=10, help='seconds per wave')
+    parser.add_argument('--slow-ms', type=int, default=200, help='pause in the middle of each request')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--foods', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        setup_django(workdir)
+        from rest_framework.authtoken.models import Token
+
+        from api.timing import percentiles
+
+        user = create_data(args.foods, cart_lines=10)
+        token = Token.objects.create(user=user).key
+
+        results = []
+        for port, kind in ((8771, 'wsgi'), (8772, 'asgi')):
+            env = dict(os.environ, ASYNC_VIEWS='true' if kind == 'asgi' else 'false')
+            server = subprocess.Popen(server_command(kind, args, port), cwd=BACKEND_DIR, env=env,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_until_up(port)
+                for clients in args.clients:
+                    latencies, errors, elapsed = asyncio.run(run_wave(
+                        port, token, clients, args.duration, args.slow_ms / 1000, args.timeout))
+                    result = {
+                        'server': kind,
+                        'clients': clients,
+                        'requests_per_second': round(len(latencies) / elapsed, 1),
+                        'errors': errors,
+                        'latency_ms': percentiles(latencies),
+                        'memory_mb': resident_memory_mb(server.pid),
+                    }
+                    results.append(result)
+                    print(f"{kind} {clients:>5} clients  {result['requests_per_second']:>8.1f} req/s  "
+                          f"errors {errors:>5}  p50 {result['latency_ms']['p50']} ms  "
+                          f"p99 {result['latency_ms']['p99']} ms  rss {result['memory_mb']} MB",
+                          file=sys.stderr)
+            finally:
+                server.send_signal(signal.SIGTERM)
+                server.wait(timeout=30)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Stress test for concurrent cart_add requests.
+
+Fires many parallel POST /api/cart/add/ calls for the same user and food
+items at a running server, then checks that the final cart quantities
+equal the number of adds sent (no lost increments, no 500 errors).
+
+Usage (server must already be running, e.g. gunicorn -w 4):
+    python benchmarks/cart_add_stress.py --base-url http://127.0.0.1:8000/api/ \
+        --requests 2000 --concurrency 64 --foods 3
+Only uses the Python standard library.
+"""
+import argparse
+import json
+import sys
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+
+def call(base_url, method, path, token=None, body=None):
+    """Send one JSON request and return (status, parsed body)"""
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Token {token}'
+    data = json.dumps(body).encode() if body is not None else None
+    request = Request(base_url + path, data=data, headers=headers, method=method)
+    try:
+        with urlopen(request, timeout=30) as response:
+            raw = response.read()
+            return response.status, json.loads(raw) if raw else None
+    except HTTPError as e:
+        raw = e.read()
+        try:
+            return e.code, json.loads(raw)
+        except ValueError:
+            return e.code, raw.decode(errors='replace')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000/api/')
+    parser.add_argument('--requests', type=int, default=2000, help='total cart_add calls')
+    parser.add_argument('--concurrency', type=int, default=64, help='parallel clients')
+    parser.add_argument('--foods', type=int, default=3, help='distinct food items to hit')
+    args = parser.parse_args()
+
+    # Fresh user so the cart starts empty
+    username = f'stress_{uuid.uuid4().hex[:10]}'
+    status_code, body = call(args.base_url, 'POST', 'register/', body={
+        'username': username, 'email': f'{username}@example.com', 'password': 'Str3ss-pass!'
+    })
+    if status_code != 201:
+        sys.exit(f'Could not register user: {status_code} {body}')
+    token = body['token']
+
+    status_code, menu = call(args.base_url, 'GET', f'foods/?limit={args.foods}')
+    if status_code != 200 or not menu['results']:
+        sys.exit('No food items found - run `python manage.py create_sample_foods` first')
+    food_ids = [food['id'] for food in menu['results']]
+
+    # Round-robin the adds over the chosen foods
+    plan = [food_ids[i % len(food_ids)] for i in range(args.requests)]
+    expected = Counter(plan)
+
+    def add(food_id):
+        return call(args.base_url, 'POST', 'cart/add/', token=token,
+                    body={'food_id': food_id, 'quantity': 1})[0]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        statuses = Counter(pool.map(add, plan))
+    elapsed = time.perf_counter() - started
+
+    status_code, cart = call(args.base_url, 'GET', 'cart/', token=token)
+    actual = Counter({item['food']['id']: item['quantity'] for item in cart['items']})
+
+    print(json.dumps({
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(args.requests / elapsed, 1),
+        'statuses': {str(code): count for code, count in sorted(statuses.items())},
+        'expected_quantities': {str(k): v for k, v in sorted(expected.items())},
+        'actual_quantities': {str(k): v for k, v in sorted(actual.items())},
+    }, indent=2))
+
+    # Successful adds must all be reflected in the cart
+    ok = sum(count for code, count in statuses.items() if code in (200, 201))
+    if ok != args.requests or actual != expected:
+        sys.exit('FAILED: lost increments or failed requests')
+    print('OK: every increment was applied')
+
+
+if __name__ == '__main__':
+    main()
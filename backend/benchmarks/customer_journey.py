@@ -0,0 +1,199 @@
+"""
+Customer journey load test: throughput and latency per endpoint.
+
+Each simulated customer runs the whole ordering flow against a running server:
+    register -> login -> food_list -> cart_add xN -> cart_view -> create_order
+Customers run --concurrency at a time until --customers have finished.
+Dishes are picked at random from the first page of the menu.
+
+The result is JSON (stdout, or --output FILE): journeys/s, and for each
+endpoint the number of requests, errors, requests/s and p50/p95/p99 latency
+in milliseconds. Keep the file of a release and pass it as --baseline to the
+next run to print the change of every number next to it.
+
+Usage (server must already be running, e.g. gunicorn -w 4 on a database
+filled with `python manage.py seed_load_data`):
+    python benchmarks/customer_journey.py --base-url http://127.0.0.1:8000/api/ \
+        --customers 500 --concurrency 32 --cart-adds 3 --output release-1.4.json
+    python benchmarks/customer_journey.py --baseline release-1.4.json
+Only uses the Python standard library.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from api.timing import percentiles  # noqa: E402  (plain Python, no Django setup needed)
+
+# In journey order; also the order of the report
+ENDPOINTS = ['register', 'login', 'food_list', 'cart_add', 'cart_view', 'create_order']
+PASSWORD = 'J0urney-pass!'
+
+
+def call(base_url, method, path, token=None, body=None):
+    """Send one JSON request and return (status, parsed body); status 0 if the server is unreachable"""
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Token {token}'
+    data = json.dumps(body).encode() if body is not None else None
+    request = Request(base_url + path, data=data, headers=headers, method=method)
+    try:
+        with urlopen(request, timeout=30) as response:
+            raw = response.read()
+            return response.status, json.loads(raw) if raw else None
+    except HTTPError as e:
+        raw = e.read()
+        try:
+            return e.code, json.loads(raw)
+        except ValueError:
+            return e.code, raw.decode(errors='replace')
+    except (URLError, OSError) as e:
+        return 0, str(e)
+
+
+class Recorder:
+    """Latencies (ms) and errors per endpoint, shared by all customer threads"""
+
+    def __init__(self):
+        self.latencies = {name: [] for name in ENDPOINTS}
+        self.errors = {name: 0 for name in ENDPOINTS}
+        self.lock = threading.Lock()
+
+    def timed_call(self, name, expected, *args, **kwargs):
+        """call() that records its latency; returns the body, or None if the status isn't in `expected`"""
+        started = time.perf_counter()
+        status_code, body = call(*args, **kwargs)
+        elapsed = (time.perf_counter() - started) * 1000
+        with self.lock:
+            self.latencies[name].append(elapsed)
+            if status_code not in expected:
+                self.errors[name] += 1
+        return body if status_code in expected else None
+
+
+def journey(args, recorder, seed):
+    """One customer's visit; returns True if they got as far as a placed order"""
+    rng = random.Random(seed)
+    url = args.base_url
+    username = f'journey_{uuid.uuid4().hex[:12]}'
+
+    if recorder.timed_call('register', (201,), url, 'POST', 'register/', body={
+        'username': username, 'email': f'{username}@example.com', 'password': PASSWORD
+    }) is None:
+        return False
+    body = recorder.timed_call('login', (200,), url, 'POST', 'login/', body={
+        'username': username, 'password': PASSWORD
+    })
+    if body is None:
+        return False
+    token = body['token']
+
+    menu = recorder.timed_call('food_list', (200,), url, 'GET', f'foods/?limit={args.menu_size}')
+    if not menu or not menu['results']:
+        return False
+    food_ids = [food['id'] for food in menu['results']]
+
+    for _ in range(args.cart_adds):
+        recorder.timed_call('cart_add', (200, 201), url, 'POST', 'cart/add/', token=token,
+                            body={'food_id': rng.choice(food_ids), 'quantity': rng.randint(1, 3)})
+    recorder.timed_call('cart_view', (200,), url, 'GET', 'cart/', token=token)
+    return recorder.timed_call('create_order', (201,), url, 'POST', 'order/create/', token=token) is not None
+
+
+def run(args):
+    recorder = Recorder()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        completed = sum(pool.map(lambda seed: journey(args, recorder, seed),
+                                 range(args.seed, args.seed + args.customers)))
+    elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for name in ENDPOINTS:
+        samples = recorder.latencies[name]
+        endpoints[name] = {
+            'requests': len(samples),
+            'errors': recorder.errors[name],
+            'requests_per_second': round(len(samples) / elapsed, 1),
+            **percentiles(samples),
+        }
+    return {
+        'base_url': args.base_url,
+        'customers': args.customers,
+        'concurrency': args.concurrency,
+        'cart_adds': args.cart_adds,
+        'seconds': round(elapsed, 3),
+        'completed_journeys': completed,
+        'journeys_per_second': round(completed / elapsed, 2),
+        'requests_per_second': round(sum(len(s) for s in recorder.latencies.values()) / elapsed, 1),
+        'endpoints': endpoints,
+    }
+
+
+def change(new, old):
+    """'+12.5%' style difference, or '' when there's nothing to compare"""
+    if not isinstance(new, (int, float)) or not isinstance(old, (int, float)) or not old:
+        return ''
+    return f'{(new - old) / old * 100:+.1f}%'
+
+
+def print_comparison(result, baseline):
+    """Table of this run next to the baseline (latency up or throughput down = slower)"""
+    rows = [('overall', 'journeys_per_second', result['journeys_per_second'],
+             baseline.get('journeys_per_second'))]
+    for name in ENDPOINTS:
+        old = baseline.get('endpoints', {}).get(name, {})
+        for column in ('requests_per_second', 'errors', 'p50', 'p95', 'p99'):
+            rows.append((name, column, result['endpoints'][name][column], old.get(column)))
+
+    print(f"{'endpoint':14}{'metric':22}{'this run':>12}{'baseline':>12}{'change':>10}", file=sys.stderr)
+    for name, column, new, old in rows:
+        old_text = '-' if old is None else str(old)
+        print(f'{name:14}{column:22}{str(new):>12}{old_text:>12}{change(new, old):>10}', file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000/api/')
+    parser.add_argument('--customers', type=int, default=200, help='journeys to run in total')
+    parser.add_argument('--concurrency', type=int, default=16, help='customers at the same time')
+    parser.add_argument('--cart-adds', type=int, default=3, help='cart_add calls per journey')
+    parser.add_argument('--menu-size', type=int, default=20, help='?limit= of the menu page customers pick from')
+    parser.add_argument('--seed', type=int, default=1, help='random seed for the dish choices')
+    parser.add_argument('--output', help='write the JSON result to this file instead of stdout')
+    parser.add_argument('--baseline', help='result file of an earlier run to compare with')
+    args = parser.parse_args()
+
+    # Fail early (and clearly) if there is no server or no menu
+    status_code, menu = call(args.base_url, 'GET', 'foods/?limit=1')
+    if status_code != 200:
+        sys.exit(f'Server not reachable at {args.base_url}: {status_code} {menu}')
+    if not menu['results']:
+        sys.exit('No food items found - run `python manage.py seed_load_data` first')
+
+    result = run(args)
+    output = json.dumps(result, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + '\n')
+    else:
+        print(output)
+
+    if args.baseline:
+        print_comparison(result, json.loads(Path(args.baseline).read_text()))
+
+    if result['completed_journeys'] < args.customers:
+        sys.exit(f"FAILED: only {result['completed_journeys']} of {args.customers} journeys placed an order")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Serializer throughput: DRF ModelSerializers vs api/fast_serializers.py.
+
+Builds a 1000-item menu and a 50-line cart in a fresh SQLite file, then
+serializes and renders each repeatedly two ways:
+  drf   FoodItemSerializer / CartItemSerializer + DRF's JSONRenderer
+  fast  fast_serializers (.values() rows) + FastJSONRenderer (orjson if installed)
+Checks that both produce the same bytes and prints responses/s as JSON.
+The database queries are included in the timings, as in a real request.
+
+Usage (from backend/):
+    python benchmarks/serializer_throughput.py --foods 1000 --cart-lines 50 --repeat 20
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django(workdir):
+    """Point Django at an empty SQLite file and migrate it"""
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fooddelivery.settings')
+    os.environ['DATABASE_URL'] = f'sqlite:///{workdir}/serializers.sqlite3'
+    import django
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def create_data(foods, cart_lines):
+    """Menu of `foods` items (half with image variants) and one user's cart"""
+    from django.contrib.auth.models import User
+    from api import search
+    from api.caching import menu_cache
+    from api.models import CartItem, FoodItem
+
+    items = []
+    for number in range(foods):
+        image = f'food_images/food{number}.jpg' if number % 2 else None
+        variants = {}
+        if image:
+            variants = {'source': image, 'hash': f'{number:012x}'}
+            for format_name, extension in (('jpeg', 'jpg'), ('webp', 'webp')):
+                variants[format_name] = [
+                    {'width': width, 'name': f'food_images/variants/{number:012x}-{width}w.{extension}'}
+                    for width in (200, 400, 800)
+                ]
+        items.append(FoodItem(
+            name=f'Dish {number} – crème brûlée',
+            description='Freshly made with seasonal ingredients. ' * 3,
+            price=Decimal(number % 40) + Decimal('0.99'),
+            image=image,
+            image_variants=variants,
+        ))
+    FoodItem.objects.bulk_create(items, batch_size=500)
+    search.rebuild_index()
+    menu_cache.bump()
+
+    user = User.objects.create_user('bench-serializers', password='x')
+    food_ids = FoodItem.objects.values_list('id', flat=True)[:cart_lines]
+    CartItem.objects.bulk_create(
+        [CartItem(user=user, food_id=food_id, quantity=2) for food_id in food_ids]
+    )
+    return user
+
+
+def measure(render, repeat):
+    """Run render() `repeat` times; return (bytes of the last run, responses per second)"""
+    body = render()  # warm up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        body = render()
+    elapsed = time.perf_counter() - started
+    return body, repeat / elapsed
+
+
+def compare(name, render, repeat):
+    """Time `render` with the DRF serializers and with the fast path"""
+    from django.conf import settings
+
+    from api import renderers
+
+    results = {}
+    bodies = {}
+    for variant, fast in (('drf', False), ('fast', True)):
+        settings.FAST_SERIALIZERS = fast
+        orjson = renderers.orjson
+        if not fast:
+            renderers.orjson = None  # plain DRF JSONRenderer
+        try:
+            bodies[variant], results[variant] = measure(render, repeat)
+        finally:
+            renderers.orjson = orjson
+
+    if bodies['drf'] != bodies['fast']:
+        raise SystemExit(f'{name}: fast path output differs from the DRF serializers')
+    return {
+        'workload': name,
+        'bytes': len(bodies['fast']),
+        'drf_per_second': round(results['drf'], 1),
+        'fast_per_second': round(results['fast'], 1),
+        'speedup': round(results['fast'] / results['drf'], 2),
+        'orjson': renderers.orjson is not None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--foods', type=int, default=1000, help='menu size')
+    parser.add_argument('--cart-lines', type=int, default=50, help='lines in the cart')
+    parser.add_argument('--repeat', type=int, default=20, help='renders per measurement')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        setup_django(workdir)
+        from django.test import RequestFactory
+
+        from api import views
+        from api.renderers import render_json
+
+        user = create_data(args.foods, args.cart_lines)
+        request = RequestFactory().get('/api/cart/', HTTP_HOST='localhost')
+        request.user = user
+
+        results = [
+            compare(f'menu ({args.foods} items)',
+                    lambda: render_json(views._menu_data(request, views._menu_rows())),
+                    args.repeat),
+            compare(f'cart ({args.cart_lines} lines)',
+                    lambda: render_json(views._cart_data(request)),
+                    args.repeat * 10),
+        ]
+
+    for result in results:
+        print(f"{result['workload']:<18} drf {result['drf_per_second']:>8.1f}/s  "
+              f"fast {result['fast_per_second']:>8.1f}/s  x{result['speedup']}", file=sys.stderr)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+SQLite write-contention load test: before vs after tuning.
+
+Runs the `benchmark_db` cart/checkout workload three times, each on a fresh
+SQLite file:
+  baseline       Django's stock SQLite backend (rollback journal, deferred BEGIN)
+  tuned          fooddelivery.sqlite_backend (WAL, pragmas, BEGIN IMMEDIATE)
+  single-writer  tuned + SQLITE_SINGLE_WRITER queue
+and prints the lock-error rate and write throughput of each as JSON.
+
+Usage (from backend/):
+    python benchmarks/sqlite_contention.py --threads 16 --users 32
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+VARIANTS = {
+    'baseline': {'SQLITE_TUNING': 'false', 'SQLITE_SINGLE_WRITER': 'false'},
+    'tuned': {'SQLITE_TUNING': 'true', 'SQLITE_SINGLE_WRITER': 'false'},
+    'single-writer': {'SQLITE_TUNING': 'true', 'SQLITE_SINGLE_WRITER': 'true'},
+}
+
+
+def run_variant(name, overrides, workload_args, workdir):
+    """Migrate a fresh database and run one benchmark worker against it"""
+    env = dict(os.environ, **overrides)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'fooddelivery.settings')
+    env['DATABASE_URL'] = f'sqlite:///{workdir}/{name}.sqlite3'
+    manage = [sys.executable, str(BACKEND_DIR / 'manage.py')]
+
+    subprocess.run(manage + ['migrate', '--noinput', '-v', '0'], env=env, check=True)
+    child = subprocess.run(manage + ['benchmark_db', '--worker'] + workload_args,
+                           env=env, capture_output=True, text=True, check=True)
+    result = json.loads(child.stdout.strip().splitlines()[-1])
+
+    attempts = result['operations'] + result['errors']
+    result['variant'] = name
+    result['lock_error_rate'] = round(result['errors'] / attempts, 4) if attempts else 0.0
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--users', type=int, default=32)
+    parser.add_argument('--orders', type=int, default=5)
+    parser.add_argument('--items', type=int, default=5)
+    args = parser.parse_args()
+    workload_args = ['--threads', str(args.threads), '--users', str(args.users),
+                     '--orders', str(args.orders), '--items', str(args.items)]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = [run_variant(name, overrides, workload_args, workdir)
+                   for name, overrides in VARIANTS.items()]
+
+    for result in results:
+        print(f"{result['variant']:<14} {result['operations_per_second']:>8.1f} writes/s  "
+              f"lock errors {result['errors']:>5} ({result['lock_error_rate']:.1%})  "
+              f"checkout p99 {result['checkout_ms']['p99']} ms", file=sys.stderr)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,11 @@ ASGI config for fooddelivery project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with uvicorn for the live order status stream
+(GET /api/orders/<id>/events/, see api/async_views.py): under ASGI an open
+stream costs a coroutine instead of a worker thread.
+    uvicorn fooddelivery.asgi:application --workers 4
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -12,6 +17,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fooddelivery.settings')
+# Lets settings pick ASGI defaults (no persistent database connections,
+# see fooddelivery/database.py)
+os.environ.setdefault('SERVER_INTERFACE', 'asgi')
 
 application = get_asgi_application()
 
@@ -0,0 +1,80 @@
+"""
+Django's built-in middleware, made cheaper under ASGI.
+
+Under ASGI, Django runs every old-style (MiddlewareMixin) middleware's
+process_request and process_response through sync_to_async, i.e. on the
+one thread that all sync code shares. With the default MIDDLEWARE list that
+is ~12 trips to that thread per request, and they queue up behind each
+other, so the async views (api/async_views.py) could never use more than
+one thread's worth of CPU for middleware.
+
+The middleware below only looks at headers and sets attributes (no database,
+no files), so it is safe to run directly on the event loop. Sessions and
+messages can write to the database, so those two still go through
+sync_to_async, but only for requests that changed the session or used
+messages (the admin), not for API calls. Under WSGI all of them behave
+exactly like Django's classes.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import middleware as auth
+from django.contrib.messages import middleware as messages
+from django.contrib.sessions import middleware as sessions
+from django.middleware import clickjacking, common, csrf, security
+
+
+class InlineAsyncMixin:
+    """Run process_request / process_response on the event loop, without sync_to_async"""
+
+    def response_needs_thread(self, request):
+        """True if process_response may touch the database for this request"""
+        return False
+
+    async def __acall__(self, request):
+        response = None
+        if hasattr(self, 'process_request'):
+            response = self.process_request(request)
+        response = response or await self.get_response(request)
+        if hasattr(self, 'process_response'):
+            if self.response_needs_thread(request):
+                response = await sync_to_async(self.process_response, thread_sensitive=True)(request, response)
+            else:
+                response = self.process_response(request, response)
+        return response
+
+
+class SecurityMiddleware(InlineAsyncMixin, security.SecurityMiddleware):
+    pass
+
+
+class SessionMiddleware(InlineAsyncMixin, sessions.SessionMiddleware):
+    # process_request only creates a lazy session; process_response saves it if it changed
+
+    def response_needs_thread(self, request):
+        session = getattr(request, 'session', None)
+        return session is not None and (session.modified or settings.SESSION_SAVE_EVERY_REQUEST)
+
+
+class CommonMiddleware(InlineAsyncMixin, common.CommonMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(InlineAsyncMixin, csrf.CsrfViewMiddleware):
+    pass
+
+
+class AuthenticationMiddleware(InlineAsyncMixin, auth.AuthenticationMiddleware):
+    # Only puts a lazy request.user on the request; it is loaded when a view uses it
+    pass
+
+
+class MessageMiddleware(InlineAsyncMixin, messages.MessageMiddleware):
+    # Messages are stored (in the cookie or the session) only if some were added or read
+
+    def response_needs_thread(self, request):
+        storage = getattr(request, '_messages', None)
+        return storage is not None and (storage.used or storage.added_new)
+
+
+class XFrameOptionsMiddleware(InlineAsyncMixin, clickjacking.XFrameOptionsMiddleware):
+    pass
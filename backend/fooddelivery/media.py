@@ -0,0 +1,149 @@
+"""
+Serve uploaded media files (MEDIA_ROOT) the same way WhiteNoise serves static files.
+
+Django's `serve` view reads the whole image through Python, sends no cache
+headers and keeps a worker busy for the whole download. WhiteNoise instead:
+- sends the file with the server's file wrapper (sendfile / zero-copy under gunicorn)
+- sends ETag and Last-Modified, and answers If-None-Match / If-Modified-Since with 304
+- supports Range requests (206 Partial Content)
+- serves a precompressed `.br` / `.gz` sibling when one exists and the client accepts it
+
+WhiteNoise normally scans its folders once at startup, but media files are
+uploaded while the server runs. This middleware looks a media file up on its
+first request and remembers it (in a bounded LRU), so later requests cost one
+dict lookup and no database or view code at all.
+
+Content-hashed names (the image variants, e.g. `3f2a9c1b7d4e-400w.webp`)
+never change, so they are cached by browsers and CDNs forever. Other uploads
+get MEDIA_MAX_AGE.
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from whitenoise.middleware import WhiteNoiseMiddleware
+from whitenoise.responders import MissingFileError
+from whitenoise.string_utils import ensure_leading_trailing_slash
+
+# Names written by api/images.py: <12 hex chars of sha256>-<width>w.<ext>
+HASHED_MEDIA_NAME_RE = re.compile(r'/[0-9a-f]{12}-\d+w\.[a-z]+$')
+
+
+class MediaWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware that also serves MEDIA_URL from MEDIA_ROOT.
+    Use it instead of whitenoise.middleware.WhiteNoiseMiddleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        # Set before super().__init__(), which already builds the static files
+        self.media_root = os.path.abspath(settings.MEDIA_ROOT) if settings.MEDIA_ROOT else None
+        self.media_prefix = ensure_leading_trailing_slash(urlparse(settings.MEDIA_URL or '').path)
+        self.media_max_age = getattr(settings, 'MEDIA_MAX_AGE', 60)
+        self.media_cache_size = getattr(settings, 'MEDIA_FILE_CACHE_SIZE', 10000)
+        self._media_files = OrderedDict()
+        self._media_lock = threading.Lock()
+        super().__init__(get_response, settings)
+        # Under ASGI, answer file requests without holding a thread for the
+        # whole request (WhiteNoise's own middleware is sync only)
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def is_media_url(self, url):
+        return self.media_root is not None and url.startswith(self.media_prefix)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        static_file = self.find_file_for_request(request)
+        if static_file is not None:
+            try:
+                return self.serve(static_file, request)
+            except FileNotFoundError:
+                # Deleted since we first saw it
+                self.forget_media_file(request.path_info)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        static_file = self.find_file_for_request(request)
+        if static_file is not None:
+            try:
+                return await sync_to_async(self.serve_buffered, thread_sensitive=False)(static_file, request)
+            except FileNotFoundError:
+                self.forget_media_file(request.path_info)
+        return await self.get_response(request)
+
+    def find_file_for_request(self, request):
+        """StaticFile for a static or media URL, or None to pass the request on"""
+        url = request.path_info
+        if self.is_media_url(url):
+            return self.find_media_file(url)
+        if self.autorefresh:
+            return self.find_file(url)
+        return self.files.get(url)
+
+    @staticmethod
+    def serve_buffered(static_file, request):
+        """
+        serve() for ASGI, run in a worker thread. Django's ASGI handler can only
+        stream a file by reading all of it in a thread anyway (with a warning),
+        so read it here; media files are images of a few hundred KB at most.
+        """
+        response = static_file.get_response(request.method, request.META)
+        body = b''
+        if response.file is not None:
+            with response.file:
+                body = response.file.read()
+        http_response = HttpResponse(body, status=int(response.status))
+        del http_response['Content-Type']
+        for key, value in response.headers:
+            http_response[key] = value
+        return http_response
+
+    def find_media_file(self, url):
+        """StaticFile for a media URL, or None if there is no such file"""
+        with self._media_lock:
+            media_file = self._media_files.get(url)
+            if media_file is not None:
+                self._media_files.move_to_end(url)
+                return media_file
+
+        if not self.url_is_canonical(url):
+            return None  # e.g. "../" in the path
+        path = os.path.join(self.media_root, url[len(self.media_prefix):])
+        if not os.path.isfile(path) or self.is_compressed_variant(path):
+            return None
+        try:
+            media_file = self.get_static_file(path, url)
+        except (MissingFileError, FileNotFoundError):
+            return None
+
+        with self._media_lock:
+            self._media_files[url] = media_file
+            while len(self._media_files) > self.media_cache_size:
+                self._media_files.popitem(last=False)
+        return media_file
+
+    def forget_media_file(self, url):
+        with self._media_lock:
+            self._media_files.pop(url, None)
+
+    def add_cache_headers(self, headers, path, url):
+        if self.is_media_url(url) and not self.immutable_file_test(path, url):
+            if self.media_max_age is not None:
+                headers['Cache-Control'] = f'max-age={self.media_max_age}, public'
+            return
+        super().add_cache_headers(headers, path, url)
+
+    def immutable_file_test(self, path, url):
+        if self.is_media_url(url):
+            return bool(HASHED_MEDIA_NAME_RE.search(url))
+        return super().immutable_file_test(path, url)
@@ -0,0 +1,24 @@
+"""
+SQLite database backend tuned for concurrent web traffic.
+
+Same as Django's built-in backend, plus:
+- PRAGMAs (WAL journal, synchronous=NORMAL, busy_timeout, mmap and cache
+  size) applied to every new connection, taken from DATABASES['PRAGMAS'].
+- Transactions start with BEGIN IMMEDIATE, so a transaction that will write
+  takes the write lock up front and waits (busy_timeout) for it. With the
+  default deferred BEGIN, a read that later upgrades to a write fails at once
+  with "database is locked" when another connection is writing.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict.get('PRAGMAS', {}).items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
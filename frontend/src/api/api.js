@@ -19,19 +19,47 @@ export const registerUser = async (data) => {
   return res.data;
 };
 
+export const logoutUser = async (token) => {
+  const res = await api.post("logout/", null, {
+    headers: { Authorization: `Token ${token}` },
+  });
+  return res.data;
+};
+
 // ---------------- FOODS ----------------
-export const getFoods = async () => {
-  const res = await api.get("foods/");
+export const searchFoods = async (q, limit = 20) => {
+  const res = await api.get("foods/search/", { params: { q, limit } });
+  return res.data;
+};
+
+export const getFood = async (id) => {
+  const res = await api.get(`foods/${id}/`);
+  return res.data;
+};
+
+// The menu, one page at a time. Returns { results, next } - pass `next`
+// back in to load the following page (null on the last page)
+export const getFoodsPage = async (next = null, limit = 20) => {
+  const res = next ? await api.get(next) : await api.get("foods/", { params: { limit } });
   return res.data;
 };
 
 // ---------------- IMAGE ----------------
+// The API already returns absolute image URLs (see MEDIA_BASE_URL on the
+// backend); this only fixes up relative paths from older responses
 export const getImageUrl = (path) => {
   if (!path) return "";
   if (path.startsWith("http")) return path;
   return `https://quickbite-food-backend-wzem.onrender.com${path}`;
 };
 
+// Build an <img srcset> string from a food's image_variants list
+// e.g. [{ width: 200, url }, { width: 400, url }] -> "url 200w, url 400w"
+export const getSrcSet = (variants) => {
+  if (!variants || variants.length === 0) return undefined;
+  return variants.map((v) => `${getImageUrl(v.url)} ${v.width}w`).join(", ");
+};
+
 // ---------------- CART ----------------
 export const getCart = async () => {
   const res = await api.get("cart/");
@@ -48,10 +76,86 @@ export const updateCartItem = async (item_id, quantity) => {
   return res.data;
 };
 
+export const removeFromCart = async (item_id) => {
+  const res = await api.delete(`cart/update/${item_id}/`);
+  return res.data;
+};
+
+// Apply several changes in one request; returns the updated cart { items, total }
+// operations: [{ op: "add", food_id, quantity }, { op: "set", item_id, quantity }, { op: "remove", item_id }]
+export const batchUpdateCart = async (operations) => {
+  const res = await api.post("cart/batch/", { operations });
+  return res.data;
+};
+
 // ---------------- ORDER ----------------
 export const createOrder = async () => {
   const res = await api.post("order/create/");
   return res.data;
 };
 
+// Past orders, newest first. Returns { results, next } - pass `next` back in for more
+export const getOrders = async (next = null) => {
+  const res = await api.get(next || "orders/");
+  return res.data;
+};
+
+export const getOrder = async (id) => {
+  const res = await api.get(`orders/${id}/`);
+  return res.data;
+};
+
+// ---------------- ORDER TRACKING ----------------
+// Live order status from the Server-Sent Events stream. EventSource can't
+// send the Authorization header, so the stream is read with fetch instead.
+// onStatus gets { order, status, label, final } for the current status and
+// every change. If the order is deleted the stream ends with a final event
+// whose status is null, which isn't passed on. Returns a function that stops
+// watching.
+export const watchOrderStatus = (orderId, onStatus) => {
+  const controller = new AbortController();
+  let retryMs = 3000;
+
+  const connect = async () => {
+    let final = false;
+    try {
+      const res = await fetch(`${API_BASE_URL}orders/${orderId}/events/`, {
+        headers: { Authorization: `Token ${localStorage.getItem("token")}` },
+        signal: controller.signal,
+      });
+      if (!res.ok) return; // Not logged in / not our order - nothing to watch
+
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        // Events end with a blank line; lines are "retry: ms", "data: {...}" or ": comment"
+        let end;
+        while ((end = buffer.indexOf("\n\n")) !== -1) {
+          const block = buffer.slice(0, end);
+          buffer = buffer.slice(end + 2);
+          for (const line of block.split("\n")) {
+            if (line.startsWith("retry: ")) retryMs = Number(line.slice(7));
+            if (line.startsWith("data: ")) {
+              const event = JSON.parse(line.slice(6));
+              final = event.final;
+              if (event.status) onStatus(event);
+            }
+          }
+        }
+      }
+    } catch {
+      // Network error or stopped - handled below
+    }
+    // The server closes streams now and then; reconnect until delivered
+    if (!final && !controller.signal.aborted) setTimeout(connect, retryMs);
+  };
+
+  connect();
+  return () => controller.abort();
+};
+
 export default api;
@@ -5,7 +5,7 @@
  */
 import { Link } from 'react-router-dom'
 import { useState } from 'react'
-import { getImageUrl } from '../api/api'
+import { getImageUrl, getSrcSet } from '../api/api'
 
 
 function FoodCard({ food }) {
@@ -43,6 +43,8 @@ function FoodCard({ food }) {
   }
   
   const imageUrl = getFoodImageUrl(food.image)
+  // Resized copies (only for uploaded images) so the browser picks a small one
+  const variants = !imageError && food.image_variants
 
   const handleImageLoad = () => {
     setImageLoaded(true)
@@ -63,14 +65,21 @@ function FoodCard({ food }) {
         {!imageLoaded && (
           <div className="absolute inset-0 skeleton"></div>
         )}
-        <img
-          src={imageUrl}
-          alt={food.name}
-          className={`w-full h-full object-cover transition-all duration-500 ${imageLoaded ? 'img-fade loaded scale-100' : 'opacity-0 scale-110'}`}
-          onLoad={handleImageLoad}
-          onError={handleImageError}
-          loading="lazy"
-        />
+        <picture>
+          {variants && variants.webp && (
+            <source type="image/webp" srcSet={getSrcSet(variants.webp)} sizes="(min-width: 768px) 33vw, 100vw" />
+          )}
+          <img
+            src={imageUrl}
+            srcSet={variants ? getSrcSet(variants.jpeg) : undefined}
+            sizes="(min-width: 768px) 33vw, 100vw"
+            alt={food.name}
+            className={`w-full h-full object-cover transition-all duration-500 ${imageLoaded ? 'img-fade loaded scale-100' : 'opacity-0 scale-110'}`}
+            onLoad={handleImageLoad}
+            onError={handleImageError}
+            loading="lazy"
+          />
+        </picture>
         {/* Price Badge */}
         <div className="absolute top-3 right-3 bg-blue-600 text-white px-3 py-1 rounded-full font-bold text-sm shadow-lg animate-scaleIn">
           ${food.price}
@@ -4,6 +4,7 @@
  */
 import { createContext, useState, useEffect, useContext } from 'react'
 import axios from 'axios'
+import { logoutUser } from '../api/api'
 
 // Create the context
 const AuthContext = createContext()
@@ -48,6 +49,10 @@ export const AuthProvider = ({ children }) => {
 
   // Logout function
   const logout = () => {
+    // Revoke the token on the server too (ignore errors - we log out locally anyway)
+    if (token) {
+      logoutUser(token).catch(() => {})
+    }
     localStorage.removeItem('token')
     localStorage.removeItem('username')
     localStorage.removeItem('userId')
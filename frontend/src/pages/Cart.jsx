@@ -5,7 +5,7 @@
  */
 import { useState, useEffect } from 'react'
 import { useNavigate } from 'react-router-dom'
-import { getCart, updateCartItem, removeFromCart, createOrder, getImageUrl } from '../api/api'
+import { getCart, batchUpdateCart, createOrder, getImageUrl } from '../api/api'
 import { useAuth } from '../context/AuthContext'
 
 function Cart() {
@@ -48,8 +48,9 @@ function Cart() {
     }
 
     try {
-      await updateCartItem(itemId, newQuantity)
-      fetchCart()  // Refresh cart
+      // The batch endpoint returns the updated cart, so no second request is needed
+      const data = await batchUpdateCart([{ op: 'set', item_id: itemId, quantity: newQuantity }])
+      setCart(data)
     } catch (err) {
       setError('Failed to update cart item')
       console.error('Error updating cart:', err)
@@ -59,8 +60,8 @@ function Cart() {
   // Remove item from cart
   const handleRemoveItem = async (itemId) => {
     try {
-      await removeFromCart(itemId)
-      fetchCart()  // Refresh cart
+      const data = await batchUpdateCart([{ op: 'remove', item_id: itemId }])
+      setCart(data)
     } catch (err) {
       setError('Failed to remove item from cart')
       console.error('Error removing item:', err)
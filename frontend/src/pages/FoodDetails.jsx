@@ -5,7 +5,7 @@
  */
 import { useState, useEffect } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
-import { getFoods, addToCart, getImageUrl } from '../api/api'
+import { getFood, addToCart, getImageUrl, getSrcSet } from '../api/api'
 import { useAuth } from '../context/AuthContext'
 
 function FoodDetails() {
@@ -26,17 +26,15 @@ function FoodDetails() {
   const fetchFoodDetails = async () => {
     try {
       setLoading(true)
-      // Since we only have list endpoint, get all and find the one we need
-      const foods = await getFoods()
-      const foundFood = foods.find(f => f.id === parseInt(id))
-      if (foundFood) {
-        setFood(foundFood)
-      } else {
+      const foundFood = await getFood(id)
+      setFood(foundFood)
+    } catch (err) {
+      if (err.response && err.response.status === 404) {
         setMessage('Food item not found')
+      } else {
+        setMessage('Failed to load food details')
+        console.error('Error fetching food:', err)
       }
-    } catch (err) {
-      setMessage('Failed to load food details')
-      console.error('Error fetching food:', err)
     } finally {
       setLoading(false)
     }
@@ -113,14 +111,22 @@ function FoodDetails() {
           <div className="md:flex">
             {/* Food Image */}
             <div className="md:w-1/2">
-              <img
-                src={imageUrl}
-                alt={food.name}
-                className="w-full h-64 md:h-full object-cover"
-                onError={(e) => {
-                  e.target.src = 'https://via.placeholder.com/600x400?text=No+Image'
-                }}
-              />
+              <picture>
+                {food.image_variants && food.image_variants.webp && (
+                  <source type="image/webp" srcSet={getSrcSet(food.image_variants.webp)} sizes="(min-width: 768px) 50vw, 100vw" />
+                )}
+                <img
+                  src={imageUrl}
+                  srcSet={food.image_variants ? getSrcSet(food.image_variants.jpeg) : undefined}
+                  sizes="(min-width: 768px) 50vw, 100vw"
+                  alt={food.name}
+                  className="w-full h-64 md:h-full object-cover"
+                  onError={(e) => {
+                    e.target.srcset = ''
+                    e.target.src = 'https://via.placeholder.com/600x400?text=No+Image'
+                  }}
+                />
+              </picture>
             </div>
 
             {/* Food Details */}
@@ -1,21 +1,30 @@
 import { useEffect, useState } from "react";
-import api from "../api/api";
+import { getFoodsPage } from "../api/api";
 import FoodCard from "../components/FoodCard";
 
 const Home = () => {
   const [foods, setFoods] = useState([]);
+  const [next, setNext] = useState(null);
+  const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
 
-  useEffect(() => {
-    api
-      .get("foods/")
-      .then((res) => {
-        setFoods(res.data);
+  // The menu comes one page at a time; `next` is the URL of the following page
+  const loadPage = (url = null) => {
+    setLoading(true);
+    getFoodsPage(url)
+      .then((page) => {
+        setFoods((current) => (url ? [...current, ...page.results] : page.results));
+        setNext(page.next);
       })
       .catch((err) => {
         console.error(err);
         setError("Failed to load food items");
-      });
+      })
+      .finally(() => setLoading(false));
+  };
+
+  useEffect(() => {
+    loadPage();
   }, []);
 
   if (error) {
@@ -27,7 +36,7 @@ const Home = () => {
       <h1 className="text-3xl font-bold text-center mb-6">Our Menu</h1>
 
       {foods.length === 0 ? (
-        <p className="text-center">No food items available.</p>
+        <p className="text-center">{loading ? "Loading..." : "No food items available."}</p>
       ) : (
         <div className="grid grid-cols-1 md:grid-cols-3 gap-6">
           {foods.map((food) => (
@@ -35,9 +44,20 @@ const Home = () => {
           ))}
         </div>
       )}
+
+      {next && (
+        <div className="text-center mt-6">
+          <button
+            onClick={() => loadPage(next)}
+            disabled={loading}
+            className="bg-blue-600 text-white px-6 py-2 rounded hover:bg-blue-700 disabled:opacity-50"
+          >
+            {loading ? "Loading..." : "Load more"}
+          </button>
+        </div>
+      )}
     </div>
   );
 };
 
 export default Home;
-
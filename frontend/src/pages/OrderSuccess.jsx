@@ -1,13 +1,32 @@
 /**
  * Order Success Page Component
- * Shows confirmation after a successful order
+ * Shows confirmation after a successful order, and its live status
  */
+import { useEffect, useState } from 'react'
 import { useNavigate, useLocation } from 'react-router-dom'
+import { watchOrderStatus } from '../api/api'
+
+// Order lifecycle, in order (same as Order.STATUS_CHOICES on the backend)
+const STEPS = [
+  { status: 'placed', label: 'Placed' },
+  { status: 'preparing', label: 'Preparing' },
+  { status: 'out_for_delivery', label: 'Out for delivery' },
+  { status: 'delivered', label: 'Delivered' },
+]
 
 function OrderSuccess() {
   const navigate = useNavigate()
   const location = useLocation()
   const order = location.state?.order
+  const [status, setStatus] = useState(order?.status || 'placed')
+
+  // The server pushes every status change - no polling
+  useEffect(() => {
+    if (!order) return
+    return watchOrderStatus(order.id, (event) => setStatus(event.status))
+  }, [order])
+
+  const currentStep = STEPS.findIndex((step) => step.status === status)
 
   return (
     <div className="container mx-auto px-4 py-12">
@@ -37,6 +56,24 @@ function OrderSuccess() {
           Thank you for your order. We'll prepare your food and deliver it to you soon!
         </p>
 
+        {/* Live Status */}
+        {order && (
+          <ol className="flex justify-between mb-6">
+            {STEPS.map((step, index) => (
+              <li key={step.status} className="flex-1 text-xs">
+                <div
+                  className={`mx-auto mb-1 w-4 h-4 rounded-full ${
+                    index <= currentStep ? 'bg-green-600' : 'bg-gray-300'
+                  }`}
+                />
+                <span className={index === currentStep ? 'font-semibold text-gray-800' : 'text-gray-500'}>
+                  {step.label}
+                </span>
+              </li>
+            ))}
+          </ol>
+        )}
+
         {/* Order Details */}
         {order && (
           <div className="bg-gray-50 rounded-lg p-4 mb-6 text-left">